@@ -3,19 +3,70 @@ import asyncio
 from datetime import timedelta
 from functools import partial
 import logging
+import time
 
-from nexia.home import NexiaHome
 from requests.exceptions import ConnectTimeout, HTTPError
 import voluptuous as vol
 
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-from homeassistant.core import HomeAssistant
+from homeassistant.const import (
+    CONF_PASSWORD,
+    CONF_USERNAME,
+    EVENT_HOMEASSISTANT_STOP,
+)
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryNotReady
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .const import DOMAIN, NEXIA_DEVICE, PLATFORMS, UPDATE_COORDINATOR
+from .const import (
+    COMMAND_CONFIRMATIONS,
+    COMMAND_STATS,
+    CONF_LOOP_CALL_THRESHOLD,
+    CONF_RECORD,
+    CONF_REPLAY,
+    CONF_REPLAY_HOUSES,
+    CONF_REPLAY_SCALE,
+    CONF_REPLAY_SPEED,
+    CONF_RETENTION,
+    CONF_STALE_BUDGET,
+    COORDINATORS,
+    DATA_LOOP_MONITOR,
+    DATA_TRANSPORT,
+    DEFAULT_RETENTION,
+    DEFAULT_STALE_BUDGET,
+    DOMAIN,
+    HOUSES,
+    HOUSE_AGGREGATES,
+    NEXIA_DEVICE,
+    ON_UNLOAD,
+    PAYLOAD_SIZE,
+    PLATFORMS,
+    RETENTION_COMPACT,
+    SCHEDULER,
+    SCHEDULE_CACHE,
+    THERMOSTAT_COORDINATORS,
+    TRANSITION_EVENTS,
+    UPDATE_COORDINATOR,
+)
+from .account import discover_houses
+from .aggregates import NexiaHouseAggregates
+from .auth import NexiaLoginRefresher
+from .confirmations import NexiaCommandConfirmations
+from .coordinator import (
+    NexiaUpdateCoordinator,
+    apply_house,
+    create_thermostat_coordinator,
+    fetch_house,
+)
+from .events import NexiaTransitionEvents
+from .executor import async_get_executor
+from .loop_monitor import NexiaLoopCallMonitor
+from .retention import compact_house, house_payload_size
+from .scheduler import NexiaScheduler
+from .schedules import NexiaScheduleCache, schedule_store
+from .session import async_get_session_cache
+from .stats import NexiaCommandStats
+from .transport import NexiaRecorder, NexiaReplay
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -24,8 +75,22 @@ CONFIG_SCHEMA = vol.Schema(
     {
         DOMAIN: vol.Schema(
             {
-                vol.Required(CONF_USERNAME): cv.string,
-                vol.Required(CONF_PASSWORD): cv.string,
+                vol.Inclusive(CONF_USERNAME, "credentials"): cv.string,
+                vol.Inclusive(CONF_PASSWORD, "credentials"): cv.string,
+                vol.Exclusive(CONF_RECORD, "transport"): cv.string,
+                vol.Exclusive(CONF_REPLAY, "transport"): cv.string,
+                vol.Optional(CONF_REPLAY_SPEED, default=1.0): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
+                vol.Optional(CONF_REPLAY_SCALE, default=1): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_REPLAY_HOUSES, default=1): vol.All(
+                    vol.Coerce(int), vol.Range(min=1)
+                ),
+                vol.Optional(CONF_LOOP_CALL_THRESHOLD): vol.All(
+                    vol.Coerce(float), vol.Range(min=0)
+                ),
             },
             extra=vol.ALLOW_EXTRA,
         ),
@@ -34,6 +99,9 @@ CONFIG_SCHEMA = vol.Schema(
 )
 
 DEFAULT_UPDATE_RATE = 120
+# The house poll only has to pick up automations and house level
+# data since every thermostat is refreshed by its own coordinator.
+HOUSE_UPDATE_RATE = 600
 
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
@@ -45,9 +113,48 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     if not conf:
         return True
 
+    if CONF_RECORD in conf:
+        _LOGGER.warning("Recording all Nexia requests to %s", conf[CONF_RECORD])
+        recorder = hass.data[DOMAIN][DATA_TRANSPORT] = NexiaRecorder(conf[CONF_RECORD])
+
+        @callback
+        def _async_close_recorder(_event):
+            hass.async_add_executor_job(recorder.close)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_close_recorder)
+    elif CONF_REPLAY in conf:
+        _LOGGER.warning("Replaying Nexia requests from %s", conf[CONF_REPLAY])
+        hass.data[DOMAIN][DATA_TRANSPORT] = await hass.async_add_executor_job(
+            NexiaReplay,
+            conf[CONF_REPLAY],
+            conf[CONF_REPLAY_SPEED],
+            conf[CONF_REPLAY_SCALE],
+            conf[CONF_REPLAY_HOUSES],
+        )
+
+    if CONF_LOOP_CALL_THRESHOLD in conf:
+        monitor = NexiaLoopCallMonitor(hass, conf[CONF_LOOP_CALL_THRESHOLD] / 1000)
+        monitor.async_start()
+        hass.data[DOMAIN][DATA_LOOP_MONITOR] = monitor
+
+        # The monitor covers every entry, so it only stops with Home Assistant
+        @callback
+        def _async_stop_monitor(_event):
+            monitor.async_stop()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_stop_monitor)
+
+    if CONF_USERNAME not in conf:
+        return True
+
     hass.async_create_task(
         hass.config_entries.flow.async_init(
-            DOMAIN, context={"source": SOURCE_IMPORT}, data=conf
+            DOMAIN,
+            context={"source": SOURCE_IMPORT},
+            data={
+                CONF_USERNAME: conf[CONF_USERNAME],
+                CONF_PASSWORD: conf[CONF_PASSWORD],
+            },
         )
     )
     return True
@@ -61,16 +168,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     password = conf[CONF_PASSWORD]
 
     state_file = hass.config.path(f"nexia_config_{username}.conf")
+    sessions = await async_get_session_cache(hass)
 
     try:
-        nexia_home = await hass.async_add_executor_job(
-            partial(
-                NexiaHome,
-                username=username,
-                password=password,
-                device_name=hass.config.location_name,
-                state_file=state_file,
-            )
+        nexia_home = await sessions.async_get_nexia_home(
+            username,
+            password,
+            device_name=hass.config.location_name,
+            state_file=state_file,
         )
     except ConnectTimeout as ex:
         _LOGGER.error("Unable to connect to Nexia service: %s", ex)
@@ -85,27 +190,199 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
         _LOGGER.error("HTTP error from Nexia service: %s", http_ex)
         raise ConfigEntryNotReady
 
+    executor = async_get_executor(hass)
+    try:
+        nexia_homes = await executor.async_add_executor_job(
+            discover_houses, nexia_home, sessions.get_house_ids(username)
+        )
+    except (ConnectTimeout, HTTPError) as ex:
+        _LOGGER.error("Unable to list the houses of %s: %s", username, ex)
+        raise ConfigEntryNotReady
+
+    # Compacting frees the raw payloads and the parts nothing reads
+    if entry.options.get(CONF_RETENTION, DEFAULT_RETENTION) == RETENTION_COMPACT:
+        retain = compact_house
+    else:
+        retain = house_payload_size
+
+    houses = {}
+    for house in nexia_homes:
+        houses[house.house_id] = {
+            NEXIA_DEVICE: house,
+            SCHEDULER: NexiaScheduler(),
+            COMMAND_STATS: NexiaCommandStats(),
+            PAYLOAD_SIZE: await executor.async_add_executor_job(retain, house),
+        }
+    # Remembered so the cached schedules can be removed with the entry
+    await sessions.async_set_house_ids(username, list(houses))
+
+    def _update_and_retain():
+        """Fetch every house and keep the parts the retention mode keeps."""
+        start, start_cpu = time.monotonic(), time.thread_time()
+        payload_sizes = {}
+        for house_id, nexia_data in houses.items():
+            house = nexia_data[NEXIA_DEVICE]
+            nexia_data[SCHEDULER].poll(
+                house.get_name(),
+                partial(fetch_house, house),
+                partial(apply_house, house),
+            )
+            payload_sizes[house_id] = retain(house)
+        _LOGGER.debug(
+            "Refreshing %s houses of %s took %.3f seconds and %.3f seconds of CPU",
+            len(houses),
+            entry.title,
+            time.monotonic() - start,
+            time.thread_time() - start_cpu,
+        )
+        return payload_sizes
+
     async def _async_update_data():
         """Fetch data from API endpoint."""
-        return await hass.async_add_job(nexia_home.update)
+        payload_sizes = await executor.async_add_executor_job(_update_and_retain)
+        for house_id, payload_size in payload_sizes.items():
+            houses[house_id][PAYLOAD_SIZE] = payload_size
+        _LOGGER.debug(
+            "Retaining %s bytes of house data for %s",
+            sum(payload_sizes.values()),
+            entry.title,
+        )
+        # The library logs in again when the session has expired
+        await sessions.async_save_tokens(nexia_home)
 
-    coordinator = DataUpdateCoordinator(
+    stale_budget = timedelta(
+        minutes=entry.options.get(CONF_STALE_BUDGET, DEFAULT_STALE_BUDGET)
+    )
+    coordinator = NexiaUpdateCoordinator(
         hass,
         _LOGGER,
         name="Nexia update",
         update_method=_async_update_data,
-        update_interval=timedelta(seconds=DEFAULT_UPDATE_RATE),
+        update_interval=timedelta(seconds=HOUSE_UPDATE_RATE),
+        stale_budget=stale_budget,
     )
+    listeners = []
+    for nexia_data in houses.values():
+        listeners.extend(
+            await _async_setup_house(
+                hass, entry, nexia_data, coordinator, sessions, stale_budget
+            )
+        )
+    # Undone in reverse order when the entry unloads
+    on_unload = [entry.add_update_listener(_async_update_listener)]
+    for update_coordinator, listener in listeners:
+        update_coordinator.async_add_listener(listener)
+        on_unload.append(partial(update_coordinator.async_remove_listener, listener))
 
+    login_refresher = NexiaLoginRefresher(hass, nexia_home, sessions)
+    coordinators = [coordinator]
+    for nexia_data in houses.values():
+        coordinators.extend(nexia_data[THERMOSTAT_COORDINATORS].values())
     hass.data[DOMAIN][entry.entry_id] = {
         NEXIA_DEVICE: nexia_home,
+        HOUSES: houses,
         UPDATE_COORDINATOR: coordinator,
+        COORDINATORS: coordinators,
+        ON_UNLOAD: on_unload,
     }
 
     for component in PLATFORMS:
         hass.async_create_task(
             hass.config_entries.async_forward_entry_setup(entry, component)
         )
+    for nexia_data in houses.values():
+        nexia_data[SCHEDULE_CACHE].async_start()
+        on_unload.append(nexia_data[SCHEDULE_CACHE].async_stop)
+        on_unload.append(nexia_data[SCHEDULER].close)
+    login_refresher.async_start()
+    on_unload.append(login_refresher.async_stop)
+
+    return True
+
+
+async def _async_setup_house(
+    hass, entry, nexia_data, coordinator, sessions, stale_budget
+):
+    """Set up the thermostat coordinators, events and caches of one house.
+
+    Returns the coordinator listeners to add.
+    """
+    nexia_home = nexia_data[NEXIA_DEVICE]
+    scheduler = nexia_data[SCHEDULER]
+    thermostat_coordinators = {
+        thermostat_id: create_thermostat_coordinator(
+            hass,
+            nexia_home,
+            nexia_home.get_thermostat_by_id(thermostat_id),
+            sessions,
+            scheduler,
+            DEFAULT_UPDATE_RATE,
+            stale_budget,
+        )
+        for thermostat_id in nexia_home.get_thermostat_ids()
+    }
+
+    transition_events = NexiaTransitionEvents(hass, nexia_home)
+    aggregates = NexiaHouseAggregates(hass, nexia_home)
+    confirmations = NexiaCommandConfirmations(hass, nexia_home)
+    listeners = [
+        (coordinator, transition_events.async_update),
+        (coordinator, aggregates.async_update_house),
+    ]
+    for thermostat_id, thermostat_coordinator in thermostat_coordinators.items():
+        thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
+        listeners.append(
+            (
+                thermostat_coordinator,
+                partial(transition_events.async_update_thermostat, thermostat),
+            )
+        )
+        listeners.append(
+            (
+                thermostat_coordinator,
+                partial(aggregates.async_update_thermostat, thermostat),
+            )
+        )
+        listeners.append(
+            (
+                thermostat_coordinator,
+                partial(
+                    confirmations.async_update_thermostat,
+                    thermostat,
+                    thermostat_coordinator,
+                ),
+            )
+        )
+
+    schedule_cache = NexiaScheduleCache(hass, nexia_home, scheduler, entry.entry_id)
+    await schedule_cache.async_load()
+
+    nexia_data[UPDATE_COORDINATOR] = coordinator
+    nexia_data[THERMOSTAT_COORDINATORS] = thermostat_coordinators
+    nexia_data[TRANSITION_EVENTS] = transition_events
+    nexia_data[HOUSE_AGGREGATES] = aggregates
+    nexia_data[COMMAND_CONFIRMATIONS] = confirmations
+    nexia_data[SCHEDULE_CACHE] = schedule_cache
+    return listeners
+
+
+async def async_migrate_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Key entries on the account instead of the first house."""
+    if entry.version == 1:
+        username = entry.data[CONF_USERNAME]
+        for other_entry in hass.config_entries.async_entries(DOMAIN):
+            if other_entry.unique_id == username:
+                # The houses of this entry are set up by the other one
+                _LOGGER.warning(
+                    "Removing %s since %s covers all the houses of %s",
+                    entry.title,
+                    other_entry.title,
+                    username,
+                )
+                hass.async_create_task(hass.config_entries.async_remove(entry.entry_id))
+                return False
+        entry.version = 2
+        hass.config_entries.async_update_entry(entry, unique_id=username)
 
     return True
 
@@ -121,6 +398,31 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
         )
     )
     if unload_ok:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        for undo in reversed(entry_data[ON_UNLOAD]):
+            undo()
+        # Refreshes in flight are cancelled; their executor jobs run to
+        # the end but the closed schedulers discard what they fetch.
+        await asyncio.gather(
+            *[coordinator.async_shutdown() for coordinator in entry_data[COORDINATORS]]
+        )
+        # The session stays cached for a reload, only its pooled
+        # connections are closed.
+        await async_get_executor(hass).async_add_executor_job(
+            entry_data[NEXIA_DEVICE].session.close
+        )
 
     return unload_ok
+
+
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry):
+    """Reload the entry when the options change."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    """Forget the cached session and schedules when a config entry is removed."""
+    sessions = await async_get_session_cache(hass)
+    for house_id in sessions.get_house_ids(entry.data[CONF_USERNAME]) or ():
+        await schedule_store(hass, entry.entry_id, house_id).async_remove()
+    await sessions.async_remove(entry.data[CONF_USERNAME])
@@ -0,0 +1,115 @@
+"""All the houses of a Nexia account."""
+import logging
+
+from nexia.const import APP_VERSION
+from nexia.home import NexiaHome
+from nexia.util import load_or_create_uuid
+from requests.exceptions import HTTPError
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def fetch_house_ids(nexia_home: NexiaHome):
+    """Return the ids of every house of the account.
+
+    The library only keeps the first house of the session.
+    """
+    # pylint: disable=protected-access
+    device_uuid = nexia_home._uuid or load_or_create_uuid(nexia_home._state_file)
+    request = nexia_home.post_url(
+        nexia_home.API_MOBILE_SESSION_URL,
+        {"app_version": APP_VERSION, "device_uuid": str(device_uuid)},
+    )
+    house_ids = []
+    for child in request.json()["result"]["_links"].get("child", ()):
+        house_id = child.get("data", {}).get("id")
+        if house_id is not None and house_id not in house_ids:
+            house_ids.append(house_id)
+    return house_ids
+
+
+def discover_houses(nexia_home: NexiaHome, house_ids=None):
+    """Return a NexiaHome for every house of the account.
+
+    The logged in NexiaHome comes first. The others share its
+    session and login.
+
+    house_ids are the houses found last time. The cloud is only asked
+    for the houses when they are not known or one of them is gone.
+
+    This does blocking I/O and should be run in the executor.
+    """
+    houses = [nexia_home]
+    for house_id in house_ids or fetch_house_ids(nexia_home):
+        if house_id == nexia_home.house_id:
+            continue
+        _LOGGER.debug("Found house %s for %s", house_id, nexia_home.username)
+        house = NexiaAccountHome(nexia_home, house_id)
+        try:
+            house.update()
+        except HTTPError as http_ex:
+            if not house_ids or not 400 <= http_ex.response.status_code < 500:
+                raise
+            _LOGGER.debug("House %s is gone, listing the houses again", house_id)
+            return discover_houses(nexia_home)
+        houses.append(house)
+    return houses
+
+
+class NexiaAccountHome(NexiaHome):
+    """Another house of an account that is already logged in.
+
+    Requests go out on the session and with the keys of the logged
+    in house, and logging in again logs that house in so every
+    house picks up the new keys at once.
+    """
+
+    def __init__(self, account_home: NexiaHome, house_id):
+        """Initialize the house without logging in.
+
+        NexiaHome.__init__ is skipped since it opens a session of its
+        own, and this house uses the one of the logged in house.
+        """
+        # pylint: disable=super-init-not-called,protected-access
+        self._account_home = account_home
+        self.username = account_home.username
+        self.password = account_home.password
+        self.house_id = house_id
+        self.login_attempts_left = account_home.login_attempts_left
+        self._state_file = account_home._state_file
+        self._device_name = account_home._device_name
+        self._uuid = account_home._uuid
+        self.devices_json = None
+        self.automations_json = None
+        self.last_update = None
+        self._name = None
+        self.thermostats = None
+        self.automations = None
+        self._last_update_etag = None
+
+    @property
+    def session(self):
+        """Return the session of the logged in house."""
+        return self._account_home.session
+
+    @property
+    def mobile_id(self):
+        """Return the mobile id of the logged in house."""
+        return self._account_home.mobile_id
+
+    @mobile_id.setter
+    def mobile_id(self, value):
+        """Ignore the mobile id, the logged in house keeps it."""
+
+    @property
+    def api_key(self):
+        """Return the api key of the logged in house."""
+        return self._account_home.api_key
+
+    @api_key.setter
+    def api_key(self, value):
+        """Ignore the api key, the logged in house keeps it."""
+
+    def login(self):
+        """Log the account in again."""
+        self._account_home.login()
@@ -0,0 +1,147 @@
+"""House-wide aggregates for Nexia / Trane XL thermostats."""
+from collections import Counter
+
+from nexia.const import SYSTEM_STATUS_COOL, SYSTEM_STATUS_HEAT
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import SIGNAL_AGGREGATE_UPDATE
+
+
+class NexiaHouseAggregates:
+    """Zone and thermostat aggregates kept up to date from per-zone deltas.
+
+    Each refresh only applies the zones whose values changed, so the
+    cost does not grow with the number of zones in the house.
+    """
+
+    def __init__(self, hass, nexia_home):
+        """Initialize from the current state of the house."""
+        self._hass = hass
+        self._house_id = nexia_home.house_id
+        self._nexia_home = nexia_home
+        self._zone_temperatures = {}
+        self._temperature_counts = Counter()
+        self._temperature_sum = 0
+        self._minimum = None
+        self._maximum = None
+        self._extremes_valid = True
+        self._zones_calling = set()
+        self._thermostats_heating = set()
+        self._thermostats_cooling = set()
+        for thermostat in nexia_home.thermostats or ():
+            self._update_thermostat(thermostat)
+
+    @property
+    def signal(self):
+        """Return the dispatcher signal sent when an aggregate changed."""
+        return f"{SIGNAL_AGGREGATE_UPDATE}-{self._house_id}"
+
+    @property
+    def average_temperature(self):
+        """Return the average zone temperature."""
+        if not self._zone_temperatures:
+            return None
+        return round(self._temperature_sum / len(self._zone_temperatures), 1)
+
+    @property
+    def minimum_temperature(self):
+        """Return the lowest zone temperature."""
+        self._ensure_extremes()
+        return self._minimum
+
+    @property
+    def maximum_temperature(self):
+        """Return the highest zone temperature."""
+        self._ensure_extremes()
+        return self._maximum
+
+    @property
+    def zones_calling(self):
+        """Return the number of zones calling for conditioning."""
+        return len(self._zones_calling)
+
+    @property
+    def thermostats_heating(self):
+        """Return the number of thermostats heating."""
+        return len(self._thermostats_heating)
+
+    @property
+    def thermostats_cooling(self):
+        """Return the number of thermostats cooling."""
+        return len(self._thermostats_cooling)
+
+    @callback
+    def async_update_house(self):
+        """Apply the deltas of every thermostat after a house refresh."""
+        changed = False
+        for thermostat in self._nexia_home.thermostats or ():
+            changed |= self._update_thermostat(thermostat)
+        if changed:
+            async_dispatcher_send(self._hass, self.signal)
+
+    @callback
+    def async_update_thermostat(self, thermostat):
+        """Apply the deltas of one thermostat after it was refreshed."""
+        if self._update_thermostat(thermostat):
+            async_dispatcher_send(self._hass, self.signal)
+
+    def _update_thermostat(self, thermostat):
+        """Apply the deltas of one thermostat and return True if any."""
+        thermostat_id = thermostat.thermostat_id
+        status = thermostat.get_system_status()
+        changed = _set_member(
+            self._thermostats_heating, thermostat_id, status == SYSTEM_STATUS_HEAT
+        )
+        changed |= _set_member(
+            self._thermostats_cooling, thermostat_id, status == SYSTEM_STATUS_COOL
+        )
+        for zone in thermostat.zones:
+            changed |= _set_member(self._zones_calling, zone.zone_id, zone.is_calling())
+            changed |= self._set_temperature(zone.zone_id, zone.get_temperature())
+        return changed
+
+    def _set_temperature(self, zone_id, temperature):
+        """Replace the temperature of a zone and return True if it changed."""
+        old = self._zone_temperatures.get(zone_id)
+        if old == temperature:
+            return False
+        if old is not None:
+            del self._zone_temperatures[zone_id]
+            self._temperature_sum -= old
+            self._temperature_counts[old] -= 1
+            if not self._temperature_counts[old]:
+                del self._temperature_counts[old]
+                if old in (self._minimum, self._maximum):
+                    # Only losing an extreme needs a rescan
+                    self._extremes_valid = False
+        if temperature is not None:
+            self._zone_temperatures[zone_id] = temperature
+            self._temperature_sum += temperature
+            self._temperature_counts[temperature] += 1
+            if self._extremes_valid:
+                if self._minimum is None or temperature < self._minimum:
+                    self._minimum = temperature
+                if self._maximum is None or temperature > self._maximum:
+                    self._maximum = temperature
+        return True
+
+    def _ensure_extremes(self):
+        """Rescan the distinct temperatures after an extreme was removed."""
+        if self._extremes_valid:
+            return
+        self._minimum = min(self._temperature_counts, default=None)
+        self._maximum = max(self._temperature_counts, default=None)
+        self._extremes_valid = True
+
+
+def _set_member(members, member, present):
+    """Add or remove member and return True if the set changed."""
+    if present == (member in members):
+        return False
+    if present:
+        members.add(member)
+    else:
+        members.discard(member)
+    return True
@@ -0,0 +1,149 @@
+"""Background credential refresh for Nexia accounts."""
+from collections import Counter
+from datetime import timedelta
+import logging
+import threading
+import time
+
+from nexia.home import NexiaHome
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .executor import async_get_executor
+
+_LOGGER = logging.getLogger(__name__)
+
+LOGIN_CHECK_INTERVAL = timedelta(minutes=5)
+
+# Log in again this often until a session has been seen to expire
+DEFAULT_SESSION_LIFETIME = 12 * 3600
+# Expiries sooner than this are taken as revoked sessions
+MIN_SESSION_LIFETIME = 1800
+# Learned lifetimes are capped so a long outage is not taken for one
+MAX_SESSION_LIFETIME = 7 * 24 * 3600
+# Fraction of the session lifetime after which it is refreshed
+REFRESH_FRACTION = 0.8
+
+LOGIN_INITIAL = "initial"
+LOGIN_EXPIRED = "expired"
+LOGIN_REFRESH = "refresh"
+
+
+class NexiaAuthHome(NexiaHome):
+    """A NexiaHome that times its logins and can refresh them early.
+
+    The library logs in again when the cloud redirects a request to
+    the login page. How long the session lasted is learned from that
+    so the next one can be refreshed in the background before it
+    expires. Only sessions this process logged in are learned from,
+    since a restored session may have been cut short by an earlier
+    run or logged in again elsewhere.
+    """
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the login statistics."""
+        self._login_lock = threading.RLock()
+        self.logins = Counter()
+        self.login_seconds = 0.0
+        self.last_login_seconds = None
+        self.logged_in_at = None
+        self.session_lifetime = None
+        # Set when logged_in_at came from storage instead of a login
+        self.login_restored = False
+        super().__init__(*args, **kwargs)
+
+    def login(self):
+        """Log in, learning the session lifetime if it expired."""
+        self._timed_login(LOGIN_EXPIRED if self.mobile_id else LOGIN_INITIAL)
+
+    def refresh_login(self):
+        """Log in again before the session expires."""
+        self._timed_login(LOGIN_REFRESH)
+
+    def login_due(self):
+        """Return True if the session should be refreshed."""
+        if not self.mobile_id:
+            return False
+        if self.logged_in_at is None:
+            return True
+        lifetime = self.session_lifetime or DEFAULT_SESSION_LIFETIME
+        return time.time() - self.logged_in_at >= lifetime * REFRESH_FRACTION
+
+    @property
+    def total_logins(self):
+        """Return the number of logins."""
+        return sum(self.logins.values())
+
+    def _timed_login(self, reason):
+        """Log in unless another thread did while this one waited."""
+        requested = time.time()
+        with self._login_lock:
+            if self.logged_in_at is not None and self.logged_in_at >= requested:
+                return
+            if (
+                reason == LOGIN_EXPIRED
+                and self.logged_in_at is not None
+                and not self.login_restored
+            ):
+                self.session_lifetime = min(
+                    max(requested - self.logged_in_at, MIN_SESSION_LIFETIME),
+                    MAX_SESSION_LIFETIME,
+                )
+            start = time.monotonic()
+            super().login()
+            self.last_login_seconds = time.monotonic() - start
+            self.login_seconds += self.last_login_seconds
+            self.logged_in_at = time.time()
+            self.login_restored = False
+            self.logins[reason] += 1
+        _LOGGER.debug(
+            "Logged in %s (%s) in %.3f seconds",
+            self.username,
+            reason,
+            self.last_login_seconds,
+        )
+
+
+class NexiaLoginRefresher:
+    """Refresh the login of an account before its session expires.
+
+    Commands and polls then find a valid session instead of paying
+    for a login round trip when the cloud rejects it.
+    """
+
+    def __init__(self, hass, nexia_home, sessions):
+        """Initialize the refresher."""
+        self._hass = hass
+        self._nexia_home = nexia_home
+        self._sessions = sessions
+        self._unsub_check = None
+
+    @callback
+    def async_start(self):
+        """Start checking the session."""
+        self._unsub_check = async_track_time_interval(
+            self._hass, self._async_check, LOGIN_CHECK_INTERVAL
+        )
+
+    @callback
+    def async_stop(self):
+        """Stop checking the session."""
+        if self._unsub_check:
+            self._unsub_check()
+            self._unsub_check = None
+
+    async def _async_check(self, _now):
+        """Log in again if the session is about to expire."""
+        if not self._nexia_home.login_due():
+            return
+        try:
+            await async_get_executor(self._hass).async_add_executor_job(
+                self._nexia_home.refresh_login
+            )
+        except Exception as ex:  # pylint: disable=broad-except
+            _LOGGER.warning(
+                "Unable to refresh the login of %s: %s", self._nexia_home.username, ex
+            )
+            return
+        await self._sessions.async_save_tokens(self._nexia_home)
@@ -2,34 +2,51 @@
 
 from homeassistant.components.binary_sensor import BinarySensorDevice
 
-from .const import DOMAIN, NEXIA_DEVICE, UPDATE_COORDINATOR
+from .const import DOMAIN, HOUSES, NEXIA_DEVICE, THERMOSTAT_COORDINATORS
 from .entity import NexiaThermostatEntity
 
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensors for a Nexia device."""
 
-    nexia_data = hass.data[DOMAIN][config_entry.entry_id]
-    nexia_home = nexia_data[NEXIA_DEVICE]
-    coordinator = nexia_data[UPDATE_COORDINATOR]
-
     entities = []
-    for thermostat_id in nexia_home.get_thermostat_ids():
-        thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
-        entities.append(
-            NexiaBinarySensor(
-                coordinator, thermostat, "is_blower_active", "Blower Active"
-            )
-        )
-        if thermostat.has_emergency_heat():
+    for nexia_data in hass.data[DOMAIN][config_entry.entry_id][HOUSES].values():
+        nexia_home = nexia_data[NEXIA_DEVICE]
+        coordinators = nexia_data[THERMOSTAT_COORDINATORS]
+        for thermostat_id in nexia_home.get_thermostat_ids():
+            thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
+            coordinator = coordinators[thermostat_id]
             entities.append(
                 NexiaBinarySensor(
-                    coordinator,
-                    thermostat,
-                    "is_emergency_heat_active",
-                    "Emergency Heat Active",
+                    coordinator, thermostat, "is_blower_active", "Blower Active"
                 )
             )
+            if thermostat.has_emergency_heat():
+                entities.append(
+                    NexiaBinarySensor(
+                        coordinator,
+                        thermostat,
+                        "is_emergency_heat_active",
+                        "Emergency Heat Active",
+                    )
+                )
+            if thermostat.has_relative_humidity():
+                entities.append(
+                    NexiaCapabilityBinarySensor(
+                        coordinator,
+                        thermostat,
+                        "has_humidify_support",
+                        "Humidify Supported",
+                    )
+                )
+                entities.append(
+                    NexiaCapabilityBinarySensor(
+                        coordinator,
+                        thermostat,
+                        "has_dehumidify_support",
+                        "Dehumidify Supported",
+                    )
+                )
 
     async_add_entities(entities, True)
 
@@ -52,3 +69,32 @@ class NexiaBinarySensor(NexiaThermostatEntity, BinarySensorDevice):
     def is_on(self):
         """Return the status of the sensor."""
         return getattr(self._thermostat, self._call)()
+
+
+class NexiaCapabilityBinarySensor(NexiaBinarySensor):
+    """Provides a capability of the thermostat that does not change.
+
+    The state is written once when the entity is added instead of after
+    every refresh.
+    """
+
+    def __init__(self, coordinator, thermostat, sensor_call, sensor_name):
+        """Initialize the nexia sensor."""
+        super().__init__(coordinator, thermostat, sensor_call, sensor_name)
+        self._state = getattr(thermostat, sensor_call)()
+
+    @property
+    def available(self):
+        """Return True, the capability is known without the cloud."""
+        return True
+
+    @property
+    def is_on(self):
+        """Return the status of the sensor."""
+        return self._state
+
+    async def async_added_to_hass(self):
+        """Do not listen for updates."""
+
+    async def async_will_remove_from_hass(self):
+        """Nothing to undo."""
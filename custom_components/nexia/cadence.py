@@ -0,0 +1,156 @@
+"""Learn when the cloud has fresh thermostat data."""
+from collections import deque
+from datetime import timedelta
+import hashlib
+import json
+import logging
+from statistics import median
+
+import homeassistant.util.dt as dt_util
+
+_LOGGER = logging.getLogger(__name__)
+
+LAST_UPDATED_AT = "last_updated_at"
+
+# Learned cadences outside these bounds are not trusted
+MIN_CADENCE = timedelta(seconds=30)
+MAX_CADENCE = timedelta(minutes=10)
+# Poll this long after fresh data is expected so it has landed
+POLL_MARGIN = timedelta(seconds=5)
+MIN_POLL_DELAY = timedelta(seconds=10)
+# Data without a timestamp is taken to be at most this old when a
+# poll finds it, so polls drift early until one finds the old data
+# and the poll right after it pins down when the data changed
+UPDATE_BRACKET = timedelta(seconds=10)
+CADENCE_SAMPLES = 8
+# A late update is looked for this many times before waiting for the
+# next one, each retry waiting twice as long as the one before
+MAX_LATE_POLLS = 3
+# Only these parts of the thermostat data are sent by the thermostat,
+# the rest only changes when a command was sent
+TELEMETRY_KEYS = (
+    LAST_UPDATED_AT,
+    "outdoor_temperature",
+    "indoor_humidity",
+    "system_status",
+    "connected",
+)
+ZONE_TELEMETRY_KEYS = ("temperature", "operating_state", "zone_status")
+FEATURE_TELEMETRY_KEYS = ("temperature", "status", "compressor_speed")
+
+
+def thermostat_updated_at(thermostat):
+    """Return when the cloud last received data from the thermostat or None."""
+    # pylint: disable=protected-access
+    updated_at = thermostat._thermostat_json.get(LAST_UPDATED_AT)
+    return updated_at and dt_util.parse_datetime(updated_at)
+
+
+def thermostat_fingerprint(thermostat):
+    """Return a digest of the readings the thermostat sent the cloud.
+
+    Command responses and compaction change other parts of the data,
+    so they are not mistaken for fresh data.
+    """
+    # pylint: disable=protected-access
+    thermostat_json = thermostat._thermostat_json
+    telemetry = [
+        _telemetry(thermostat_json, TELEMETRY_KEYS),
+        [
+            _telemetry(zone_json, ZONE_TELEMETRY_KEYS)
+            for zone_json in thermostat_json.get("zones", ())
+        ],
+    ]
+    return hashlib.sha1(
+        json.dumps(telemetry, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def _telemetry(data, keys):
+    """Return the telemetry values of a thermostat or zone dict."""
+    values = [data.get(key) for key in keys]
+    for feature in data.get("features", ()):
+        values.extend(feature[key] for key in FEATURE_TELEMETRY_KEYS if key in feature)
+    return values
+
+
+class NexiaCadence:
+    """Phase lock polls to the cadence the cloud refreshes a thermostat at.
+
+    Fresh data is recognized by the last_updated_at timestamp of the
+    payload, or by a changed fingerprint when the payload has none.
+    The median gap between fresh payloads is the cadence and the next
+    poll is scheduled just after the next fresh payload is expected.
+    A poll that finds the old data is retried a few times with a
+    growing delay until the late payload lands.
+    """
+
+    def __init__(self, name, default_interval):
+        """Initialize the cadence."""
+        self._name = name
+        self._default_interval = default_interval
+        self._gaps = deque(maxlen=CADENCE_SAMPLES)
+        self._updated_at = None
+        self._fingerprint = None
+        self._polled_at = None
+        self._late_polls = 0
+        self.stale_polls = 0
+        self.fresh_polls = 0
+
+    @property
+    def cadence(self):
+        """Return the learned cadence or None until it is known."""
+        if not self._gaps:
+            return None
+        return min(max(median(self._gaps), MIN_CADENCE), MAX_CADENCE)
+
+    def observe(self, updated_at, fingerprint=None):
+        """Record the payload of a poll.
+
+        updated_at is the time the cloud stamped the payload with or
+        None, in which case fingerprint is compared and the data is
+        estimated to have changed between the last poll that found
+        the old data and this one.
+        """
+        polled_at, self._polled_at = self._polled_at, dt_util.utcnow()
+        if updated_at is None:
+            if fingerprint == self._fingerprint:
+                self.stale_polls += 1
+                return
+            self._fingerprint = fingerprint
+            updated_at = self._polled_at - UPDATE_BRACKET
+            if polled_at is not None:
+                updated_at = max(updated_at, polled_at)
+        elif self._updated_at is not None and updated_at <= self._updated_at:
+            self.stale_polls += 1
+            return
+
+        self.fresh_polls += 1
+        self._late_polls = 0
+        if self._updated_at is not None:
+            self._gaps.append(updated_at - self._updated_at)
+        self._updated_at = updated_at
+
+    def next_poll_delay(self):
+        """Return how long to wait before the next poll."""
+        cadence = self.cadence
+        if cadence is None:
+            return self._default_interval
+        now = dt_util.utcnow()
+        expected = self._updated_at + cadence + POLL_MARGIN
+        if (
+            expected <= now < expected + cadence / 2
+            and self._late_polls < MAX_LATE_POLLS
+        ):
+            # The update is late, look again soon
+            expected = now + MIN_POLL_DELAY * 2 ** self._late_polls
+            self._late_polls += 1
+        elif expected <= now:
+            # Skip the expected updates we have already missed
+            self._late_polls = 0
+            expected += cadence * ((now - expected) // cadence + 1)
+        delay = max(expected - now, MIN_POLL_DELAY)
+        _LOGGER.debug(
+            "%s refreshes every %s, polling again in %s", self._name, cadence, delay
+        )
+        return delay
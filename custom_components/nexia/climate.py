@@ -1,5 +1,9 @@
 """Support for Nexia / Trane XL thermostats."""
+from contextlib import contextmanager
+from functools import partial
 import logging
+import math
+import time
 
 from nexia.const import (
     OPERATION_MODE_AUTO,
@@ -16,8 +20,7 @@ import voluptuous as vol
 from homeassistant.components.climate import ClimateDevice
 from homeassistant.components.climate.const import (
     ATTR_HUMIDITY,
-    ATTR_MAX_HUMIDITY,
-    ATTR_MIN_HUMIDITY,
+    ATTR_HVAC_MODE,
     ATTR_TARGET_TEMP_HIGH,
     ATTR_TARGET_TEMP_LOW,
     CURRENT_HVAC_COOL,
@@ -29,6 +32,12 @@ from homeassistant.components.climate.const import (
     HVAC_MODE_HEAT,
     HVAC_MODE_HEAT_COOL,
     HVAC_MODE_OFF,
+    SERVICE_SET_AUX_HEAT,
+    SERVICE_SET_FAN_MODE,
+    SERVICE_SET_HUMIDITY,
+    SERVICE_SET_HVAC_MODE,
+    SERVICE_SET_PRESET_MODE,
+    SERVICE_SET_TEMPERATURE,
     SUPPORT_AUX_HEAT,
     SUPPORT_FAN_MODE,
     SUPPORT_PRESET_MODE,
@@ -46,20 +55,30 @@ from homeassistant.helpers import entity_platform
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.dispatcher import dispatcher_send
 
+from .commands import (
+    async_send_zone_posts,
+    mode_post,
+    run_mode_post,
+    setpoints_post,
+)
+from .confirmations import PendingCommand
 from .const import (
     ATTR_AIRCLEANER_MODE,
     ATTR_DEHUMIDIFY_SETPOINT,
-    ATTR_DEHUMIDIFY_SUPPORTED,
     ATTR_HUMIDIFY_SETPOINT,
-    ATTR_HUMIDIFY_SUPPORTED,
     ATTR_ZONE_STATUS,
+    COMMAND_CONFIRMATIONS,
+    COMMAND_STATS,
     DOMAIN,
+    HOUSES,
     NEXIA_DEVICE,
     SIGNAL_THERMOSTAT_UPDATE,
     SIGNAL_ZONE_UPDATE,
-    UPDATE_COORDINATOR,
+    SCHEDULER,
+    THERMOSTAT_COORDINATORS,
 )
 from .entity import NexiaThermostatZoneEntity
+from .executor import async_get_executor
 from .util import percent_conv
 
 SERVICE_SET_AIRCLEANER_MODE = "set_aircleaner_mode"
@@ -108,27 +127,36 @@ NEXIA_TO_HA_HVAC_MODE_MAP = {
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up climate for a Nexia device."""
 
-    nexia_data = hass.data[DOMAIN][config_entry.entry_id]
-    nexia_home = nexia_data[NEXIA_DEVICE]
-    coordinator = nexia_data[UPDATE_COORDINATOR]
-
     platform = entity_platform.current_platform.get()
 
     platform.async_register_entity_service(
         SERVICE_SET_HUMIDIFY_SETPOINT,
         SET_HUMIDITY_SCHEMA,
-        SERVICE_SET_HUMIDIFY_SETPOINT,
+        f"async_{SERVICE_SET_HUMIDIFY_SETPOINT}",
     )
     platform.async_register_entity_service(
-        SERVICE_SET_AIRCLEANER_MODE, SET_AIRCLEANER_SCHEMA, SERVICE_SET_AIRCLEANER_MODE
+        SERVICE_SET_AIRCLEANER_MODE,
+        SET_AIRCLEANER_SCHEMA,
+        f"async_{SERVICE_SET_AIRCLEANER_MODE}",
     )
 
     entities = []
-    for thermostat_id in nexia_home.get_thermostat_ids():
-        thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
-        for zone_id in thermostat.get_zone_ids():
-            zone = thermostat.get_zone_by_id(zone_id)
-            entities.append(NexiaZone(coordinator, zone))
+    for nexia_data in hass.data[DOMAIN][config_entry.entry_id][HOUSES].values():
+        nexia_home = nexia_data[NEXIA_DEVICE]
+        coordinators = nexia_data[THERMOSTAT_COORDINATORS]
+        command_stats = nexia_data[COMMAND_STATS]
+        confirmations = nexia_data[COMMAND_CONFIRMATIONS]
+        scheduler = nexia_data[SCHEDULER]
+        for thermostat_id in nexia_home.get_thermostat_ids():
+            thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
+            coordinator = coordinators[thermostat_id]
+            for zone_id in thermostat.get_zone_ids():
+                zone = thermostat.get_zone_by_id(zone_id)
+                entities.append(
+                    NexiaZone(
+                        coordinator, zone, command_stats, confirmations, scheduler
+                    )
+                )
 
     async_add_entities(entities, True)
 
@@ -136,11 +164,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
     """Provides Nexia Climate support."""
 
-    def __init__(self, coordinator, zone):
+    def __init__(self, coordinator, zone, command_stats, confirmations, scheduler):
         """Initialize the thermostat."""
         super().__init__(
             coordinator, zone, name=zone.get_name(), unique_id=zone.zone_id
         )
+        self._command_stats = command_stats
+        self._confirmations = confirmations
+        self._scheduler = scheduler
         self._undo_humidfy_dispatcher = None
         self._undo_aircleaner_dispatcher = None
         # The has_* calls are stable for the life of the device
@@ -149,6 +180,12 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
         self._has_emergency_heat = self._thermostat.has_emergency_heat()
         self._has_humidify_support = self._thermostat.has_humidify_support()
         self._has_dehumidify_support = self._thermostat.has_dehumidify_support()
+        self._humidity_limits = [
+            percent_conv(limit)
+            for limit in self._thermostat.get_humidity_setpoint_limits()
+        ]
+        self._scale_features = None
+        self._scale = None
 
     @property
     def supported_features(self):
@@ -176,7 +213,7 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
     @property
     def temperature_unit(self):
         """Return the unit of measurement."""
-        return TEMP_CELSIUS if self._thermostat.get_unit() == "C" else TEMP_FAHRENHEIT
+        return TEMP_CELSIUS if self._thermostat_scale()[0] == "C" else TEMP_FAHRENHEIT
 
     @property
     def current_temperature(self):
@@ -196,16 +233,23 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
     @property
     def min_temp(self):
         """Minimum temp for the current setting."""
-        return (self._thermostat.get_setpoint_limits())[0]
+        return self._thermostat_scale()[1]
 
     @property
     def max_temp(self):
         """Maximum temp for the current setting."""
-        return (self._thermostat.get_setpoint_limits())[1]
+        return self._thermostat_scale()[2]
 
     def set_fan_mode(self, fan_mode):
         """Set new target fan mode."""
-        self._thermostat.set_fan_mode(fan_mode)
+        if self._command_is_noop(
+            SERVICE_SET_FAN_MODE, fan_mode == self._thermostat.get_fan_mode()
+        ):
+            return
+        with self._command(
+            SERVICE_SET_FAN_MODE, self._thermostat.get_fan_mode, fan_mode, zone=False
+        ):
+            self._thermostat.set_fan_mode(fan_mode)
         self._signal_thermostat_update()
 
     @property
@@ -220,7 +264,18 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
 
     def set_humidity(self, humidity):
         """Dehumidify target."""
-        self._thermostat.set_dehumidify_setpoint(humidity / 100.0)
+        if self._command_is_noop(
+            SERVICE_SET_HUMIDITY,
+            _humidity_setpoint(humidity) == self._thermostat.get_dehumidify_setpoint(),
+        ):
+            return
+        with self._command(
+            SERVICE_SET_HUMIDITY,
+            self._thermostat.get_dehumidify_setpoint,
+            _humidity_setpoint(humidity),
+            zone=False,
+        ):
+            self._thermostat.set_dehumidify_setpoint(humidity / 100.0)
         self._signal_thermostat_update()
 
     @property
@@ -232,6 +287,16 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
             return percent_conv(self._thermostat.get_humidify_setpoint())
         return None
 
+    @property
+    def min_humidity(self):
+        """Return the minimum humidity setpoint."""
+        return self._humidity_limits[0]
+
+    @property
+    def max_humidity(self):
+        """Return the maximum humidity setpoint."""
+        return self._humidity_limits[1]
+
     @property
     def current_humidity(self):
         """Humidity indoors."""
@@ -253,7 +318,7 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
     @property
     def target_temperature_step(self):
         """Step size of temperature units."""
-        if self._thermostat.get_unit() == UNIT_FAHRENHEIT:
+        if self._thermostat_scale()[0] == UNIT_FAHRENHEIT:
             return 1.0
         return 0.5
 
@@ -320,7 +385,7 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
             HVAC_MODE_COOL,
         ]
 
-    def set_temperature(self, **kwargs):
+    async def async_set_temperature(self, **kwargs):
         """Set target temperature."""
         new_heat_temp = kwargs.get(ATTR_TARGET_TEMP_LOW)
         new_cool_temp = kwargs.get(ATTR_TARGET_TEMP_HIGH)
@@ -345,11 +410,44 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
             if new_cool_temp - new_heat_temp < deadband:
                 new_heat_temp = new_cool_temp - deadband
 
-        self._zone.set_heat_cool_temp(
-            heat_temperature=new_heat_temp,
-            cool_temperature=new_cool_temp,
-            set_temperature=set_temp,
+        posts = []
+        hvac_mode = kwargs.get(ATTR_HVAC_MODE)
+        if hvac_mode and not self._command_is_noop(
+            SERVICE_SET_HVAC_MODE, self._hvac_mode_unchanged(hvac_mode)
+        ):
+            posts = self._hvac_mode_posts(hvac_mode)
+
+        heat, cool = self._requested_setpoints(
+            new_heat_temp, new_cool_temp, set_temp, hvac_mode
         )
+        setpoints_unchanged = self._setpoints_unchanged(heat, cool)
+        if (
+            self._command_is_noop(SERVICE_SET_TEMPERATURE, setpoints_unchanged)
+            and not posts
+        ):
+            return
+        with self._command(
+            SERVICE_SET_TEMPERATURE,
+            partial(self._zone_targets, hvac_mode, heat is not None, cool is not None),
+            (heat, cool, True),
+        ):
+            if setpoints_unchanged:
+                await async_send_zone_posts(self.hass, self._zone, posts)
+            elif new_heat_temp and new_cool_temp:
+                # The setpoints are sent once the mode has landed
+                posts.append(setpoints_post(self._zone, new_heat_temp, new_cool_temp))
+                await async_send_zone_posts(self.hass, self._zone, posts)
+            else:
+                # The library works the setpoints out from the mode
+                await async_send_zone_posts(self.hass, self._zone, posts)
+                await self._async_run(
+                    partial(
+                        self._zone.set_heat_cool_temp,
+                        heat_temperature=new_heat_temp,
+                        cool_temperature=new_cool_temp,
+                        set_temperature=set_temp,
+                    )
+                )
         self._signal_zone_update()
 
     @property
@@ -367,17 +465,6 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
         if not self._has_relative_humidity:
             return data
 
-        min_humidity = percent_conv(self._thermostat.get_humidity_setpoint_limits()[0])
-        max_humidity = percent_conv(self._thermostat.get_humidity_setpoint_limits()[1])
-        data.update(
-            {
-                ATTR_MIN_HUMIDITY: min_humidity,
-                ATTR_MAX_HUMIDITY: max_humidity,
-                ATTR_DEHUMIDIFY_SUPPORTED: self._has_dehumidify_support,
-                ATTR_HUMIDIFY_SUPPORTED: self._has_humidify_support,
-            }
-        )
-
         if self._has_dehumidify_support:
             dehumdify_setpoint = percent_conv(
                 self._thermostat.get_dehumidify_setpoint()
@@ -392,50 +479,212 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
 
     def set_preset_mode(self, preset_mode: str):
         """Set the preset mode."""
-        self._zone.set_preset(preset_mode)
+        if self._command_is_noop(
+            SERVICE_SET_PRESET_MODE, preset_mode == self._zone.get_preset()
+        ):
+            return
+        with self._command(SERVICE_SET_PRESET_MODE, self._zone.get_preset, preset_mode):
+            self._zone.set_preset(preset_mode)
         self._signal_zone_update()
 
     def turn_aux_heat_off(self):
         """Turn. Aux Heat off."""
-        self._thermostat.set_emergency_heat(False)
+        if self._command_is_noop(
+            SERVICE_SET_AUX_HEAT, not self._thermostat.is_emergency_heat_active()
+        ):
+            return
+        with self._command(
+            SERVICE_SET_AUX_HEAT,
+            self._thermostat.is_emergency_heat_active,
+            False,
+            zone=False,
+        ):
+            self._thermostat.set_emergency_heat(False)
         self._signal_thermostat_update()
 
     def turn_aux_heat_on(self):
         """Turn. Aux Heat on."""
-        self._thermostat.set_emergency_heat(True)
+        if self._command_is_noop(
+            SERVICE_SET_AUX_HEAT, self._thermostat.is_emergency_heat_active()
+        ):
+            return
+        with self._command(
+            SERVICE_SET_AUX_HEAT,
+            self._thermostat.is_emergency_heat_active,
+            True,
+            zone=False,
+        ):
+            self._thermostat.set_emergency_heat(True)
         self._signal_thermostat_update()
 
-    def turn_off(self):
+    async def async_turn_off(self):
         """Turn. off the zone."""
-        self.set_hvac_mode(OPERATION_MODE_OFF)
-        self._signal_zone_update()
+        await self.async_set_hvac_mode(HVAC_MODE_OFF)
 
-    def turn_on(self):
+    async def async_turn_on(self):
         """Turn. on the zone."""
-        self.set_hvac_mode(OPERATION_MODE_AUTO)
-        self._signal_zone_update()
+        await self.async_set_hvac_mode(HVAC_MODE_AUTO)
 
-    def set_hvac_mode(self, hvac_mode: str) -> None:
+    async def async_set_hvac_mode(self, hvac_mode):
         """Set the system mode (Auto, Heat_Cool, Cool, Heat, etc)."""
-        if hvac_mode == HVAC_MODE_AUTO:
-            self._zone.call_return_to_schedule()
-            self._zone.set_mode(mode=OPERATION_MODE_AUTO)
-        else:
-            self._zone.call_permanent_hold()
-            self._zone.set_mode(mode=HA_TO_NEXIA_HVAC_MODE_MAP[hvac_mode])
-
-        self.schedule_update_ha_state()
+        if self._command_is_noop(
+            SERVICE_SET_HVAC_MODE, self._hvac_mode_unchanged(hvac_mode)
+        ):
+            return
+        with self._command(
+            SERVICE_SET_HVAC_MODE, partial(self._hvac_mode_unchanged, hvac_mode), True
+        ):
+            await async_send_zone_posts(
+                self.hass, self._zone, self._hvac_mode_posts(hvac_mode)
+            )
+        self._signal_zone_update()
 
     def set_aircleaner_mode(self, aircleaner_mode):
         """Set the aircleaner mode."""
-        self._thermostat.set_air_cleaner(aircleaner_mode)
+        if self._command_is_noop(
+            SERVICE_SET_AIRCLEANER_MODE,
+            aircleaner_mode.lower() == self._thermostat.get_air_cleaner_mode(),
+        ):
+            return
+        with self._command(
+            SERVICE_SET_AIRCLEANER_MODE,
+            self._thermostat.get_air_cleaner_mode,
+            aircleaner_mode.lower(),
+            zone=False,
+        ):
+            self._thermostat.set_air_cleaner(aircleaner_mode)
         self._signal_thermostat_update()
 
     def set_humidify_setpoint(self, humidity):
         """Set the humidify setpoint."""
-        self._thermostat.set_humidify_setpoint(humidity / 100.0)
+        if self._command_is_noop(
+            SERVICE_SET_HUMIDIFY_SETPOINT,
+            _humidity_setpoint(humidity) == self._thermostat.get_humidify_setpoint(),
+        ):
+            return
+        with self._command(
+            SERVICE_SET_HUMIDIFY_SETPOINT,
+            self._thermostat.get_humidify_setpoint,
+            _humidity_setpoint(humidity),
+            zone=False,
+        ):
+            self._thermostat.set_humidify_setpoint(humidity / 100.0)
         self._signal_thermostat_update()
 
+    @contextmanager
+    def _command(self, command, read, expected, zone=True):
+        """Send a command ahead of any poll and track it until a poll confirms it.
+
+        It is confirmed once read() returns expected.
+        """
+        started = time.monotonic()
+        with self._scheduler.command():
+            yield
+            sent = time.monotonic()
+        self._confirmations.track(
+            self._thermostat.thermostat_id,
+            PendingCommand(
+                command,
+                self._zone.zone_id if zone else None,
+                read,
+                expected,
+                started,
+                sent,
+            ),
+        )
+
+    def _requested_setpoints(self, heat, cool, set_temp, hvac_mode):
+        """Return the heat and cool setpoints a temperature command asks for.
+
+        They are worked out the way the library does from the mode
+        the command leaves the zone in. A setpoint the library derives
+        from the current setpoints is None.
+        """
+        zone = self._zone
+        if set_temp is None or (heat and cool):
+            return (
+                zone.round_temp(heat) if heat else None,
+                zone.round_temp(cool) if cool else None,
+            )
+        if hvac_mode:
+            mode = HA_TO_NEXIA_HVAC_MODE_MAP[hvac_mode]
+        else:
+            mode = zone.get_current_mode()
+        set_temp = zone.round_temp(set_temp)
+        if mode == OPERATION_MODE_COOL:
+            return None, set_temp
+        if mode == OPERATION_MODE_HEAT:
+            return set_temp, None
+        half_deadband = math.ceil(self._thermostat.get_deadband() / 2)
+        return set_temp - half_deadband, set_temp + half_deadband
+
+    def _setpoints_unchanged(self, heat, cool):
+        """Return True if the zone already has the requested setpoints."""
+        return (heat is None or heat == self._zone.get_heating_setpoint()) and (
+            cool is None or cool == self._zone.get_cooling_setpoint()
+        )
+
+    def _zone_targets(self, hvac_mode, heat, cool):
+        """Return the requested setpoints and whether the hvac mode is set.
+
+        A setpoint that was not requested is returned as None.
+        """
+        return (
+            self._zone.get_heating_setpoint() if heat else None,
+            self._zone.get_cooling_setpoint() if cool else None,
+            hvac_mode is None or self._hvac_mode_unchanged(hvac_mode),
+        )
+
+    def _thermostat_scale(self):
+        """Return the unit and the setpoint limits of the thermostat.
+
+        The library finds them by searching the thermostat features on
+        every call and a state write reads them about ten times, so they
+        are read once each time the thermostat json is refreshed.
+        """
+        # pylint: disable=protected-access
+        features = self._thermostat._thermostat_json.get("features")
+        if features is not self._scale_features:
+            self._scale_features = features
+            self._scale = (
+                self._thermostat.get_unit(),
+                *self._thermostat.get_setpoint_limits(),
+            )
+        return self._scale
+
+    def _hvac_mode_posts(self, hvac_mode):
+        """Return the posts that change the zone to the hvac mode."""
+        if hvac_mode == HVAC_MODE_AUTO:
+            return [
+                run_mode_post(self._zone, True),
+                mode_post(self._zone, OPERATION_MODE_AUTO),
+            ]
+        return [
+            run_mode_post(self._zone, False),
+            mode_post(self._zone, HA_TO_NEXIA_HVAC_MODE_MAP[hvac_mode]),
+        ]
+
+    def _hvac_mode_unchanged(self, hvac_mode):
+        """Return True if the zone already runs in the hvac mode."""
+        mode = self._zone.get_requested_mode()
+        hold = self._zone.is_in_permanent_hold()
+        if hvac_mode == HVAC_MODE_AUTO:
+            return mode == OPERATION_MODE_AUTO and not hold
+        return hold and mode == HA_TO_NEXIA_HVAC_MODE_MAP[hvac_mode]
+
+    def _command_is_noop(self, command, unchanged):
+        """Count the command and return True if it should be skipped.
+
+        Automations often re-assert the current state so skipping
+        those saves a cloud round trip and a state write.
+        """
+        self._command_stats.record(command, unchanged)
+        if unchanged:
+            _LOGGER.debug(
+                "Skipping %s for %s, nothing would change", command, self.name
+            )
+        return unchanged
+
     def _signal_thermostat_update(self):
         """Signal a thermostat update.
 
@@ -459,9 +708,49 @@ class NexiaZone(NexiaThermostatZoneEntity, ClimateDevice):
         """
         dispatcher_send(self.hass, f"{SIGNAL_ZONE_UPDATE}-{self._zone.zone_id}")
 
+    async def async_set_fan_mode(self, fan_mode):
+        """Set new target fan mode."""
+        await self._async_run(self.set_fan_mode, fan_mode)
+
+    async def async_set_humidity(self, humidity):
+        """Dehumidify target."""
+        await self._async_run(self.set_humidity, humidity)
+
+    async def async_set_preset_mode(self, preset_mode):
+        """Set the preset mode."""
+        await self._async_run(self.set_preset_mode, preset_mode)
+
+    async def async_turn_aux_heat_off(self):
+        """Turn. Aux Heat off."""
+        await self._async_run(self.turn_aux_heat_off)
+
+    async def async_turn_aux_heat_on(self):
+        """Turn. Aux Heat on."""
+        await self._async_run(self.turn_aux_heat_on)
+
+    async def async_set_aircleaner_mode(self, aircleaner_mode):
+        """Set the aircleaner mode."""
+        await self._async_run(self.set_aircleaner_mode, aircleaner_mode)
+
+    async def async_set_humidify_setpoint(self, humidity):
+        """Set the humidify setpoint."""
+        await self._async_run(self.set_humidify_setpoint, humidity)
+
+    async def _async_run(self, target, *args):
+        """Run a command on the Nexia worker pool."""
+        await async_get_executor(self.hass).async_add_executor_job(target, *args)
+
     async def async_update(self):
         """Update the entity.
 
         Only used by the generic entity update service.
         """
         await self._coordinator.async_request_refresh()
+
+
+def _humidity_setpoint(humidity):
+    """Return the 0-1 setpoint the library sets for a 0-100 humidity.
+
+    The library rounds humidity setpoints to 5% steps.
+    """
+    return round(0.05 * round(humidity / 100.0 / 0.05), 2)
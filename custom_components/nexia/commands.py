@@ -0,0 +1,169 @@
+"""Fused multi-step commands for Nexia zones."""
+import asyncio
+from collections import namedtuple
+
+from nexia.const import HOLD_PERMANENT, OPERATION_MODES
+
+from .executor import async_get_executor
+
+# A zone post and what it changes in the zone json: the types of the
+# zone settings, the names of the zone features and the top level
+# zone keys. A dependent post is only sent once every post before it
+# has landed.
+ZonePost = namedtuple(
+    "ZonePost", ["end_point", "payload", "settings", "features", "keys", "dependent"]
+)
+
+RUN_MODE = "run_mode"
+ZONE_MODE = "zone_mode"
+SETPOINTS = "setpoints"
+PRESET_SELECTED = "preset_selected"
+
+FEATURE_THERMOSTAT = "thermostat"
+FEATURE_MODE = "thermostat_mode"
+FEATURE_RUN_MODE = "thermostat_run_mode"
+
+KEY_CURRENT_ZONE_MODE = "current_zone_mode"
+SETPOINT_KEYS = (SETPOINTS, "heating_setpoint", "cooling_setpoint")
+
+
+def run_mode_post(zone, follow_schedule):
+    """Return the post that returns the zone to its schedule or holds it.
+
+    Returns None when the zone is already held.
+    """
+    if follow_schedule:
+        # The schedule also brings back its preset and setpoints
+        return ZonePost(
+            "return_to_schedule",
+            {},
+            (RUN_MODE, PRESET_SELECTED),
+            (FEATURE_RUN_MODE, FEATURE_THERMOSTAT),
+            SETPOINT_KEYS,
+            False,
+        )
+    # pylint: disable=protected-access
+    run_mode = zone._get_zone_run_mode()
+    if run_mode and run_mode["current_value"] != HOLD_PERMANENT:
+        return ZonePost(
+            RUN_MODE,
+            {"value": HOLD_PERMANENT},
+            (RUN_MODE,),
+            (FEATURE_RUN_MODE,),
+            (),
+            False,
+        )
+    return None
+
+
+def mode_post(zone, mode):
+    """Return the post that sets the mode of the zone."""
+    if mode not in OPERATION_MODES:
+        raise KeyError(
+            f'Invalid mode "{mode}". Select one of the following: {OPERATION_MODES}'
+        )
+    return ZonePost(
+        ZONE_MODE,
+        {"value": mode},
+        (ZONE_MODE,),
+        (FEATURE_MODE,),
+        (KEY_CURRENT_ZONE_MODE,),
+        False,
+    )
+
+
+def setpoints_post(zone, heat_temperature, cool_temperature):
+    """Return the post that sets both setpoints of the zone.
+
+    It depends on the posts before it since the mode decides which
+    setpoints are valid and the schedule brings back its own.
+
+    Returns None when the setpoints are already set.
+    """
+    heat_temperature = zone.round_temp(heat_temperature)
+    cool_temperature = zone.round_temp(cool_temperature)
+    zone.check_heat_cool_setpoints(heat_temperature, cool_temperature)
+    if (
+        zone.get_heating_setpoint() == heat_temperature
+        and zone.get_cooling_setpoint() == cool_temperature
+    ):
+        return None
+    return ZonePost(
+        SETPOINTS,
+        {"heat": heat_temperature, "cool": cool_temperature},
+        (),
+        (FEATURE_THERMOSTAT,),
+        SETPOINT_KEYS,
+        True,
+    )
+
+
+async def async_send_zone_posts(hass, zone, posts):
+    """Send the posts of one command, at once where they are independent.
+
+    Each post would otherwise wait for the response of the one before
+    it. A response may have been produced before a post sent with it
+    landed, so what each post changed is restored from its own
+    response afterwards.
+    """
+    executor = async_get_executor(hass)
+    for stage in _stages(post for post in posts if post):
+        results = await asyncio.gather(
+            *[
+                executor.async_add_executor_job(_send_zone_post, zone, post)
+                for post in stage
+            ]
+        )
+        for result in results:
+            zone.update_zone_json(result)
+        if len(stage) > 1:
+            for post, result in zip(stage, results):
+                _restore_post_result(zone, post, result)
+
+
+def _stages(posts):
+    """Split posts into the groups that can be sent at once."""
+    stages = []
+    for post in posts:
+        if not stages or post.dependent:
+            stages.append([])
+        stages[-1].append(post)
+    return stages
+
+
+def _send_zone_post(zone, post):
+    """Send one post and return the zone json it responded with.
+
+    This does blocking I/O and should be run in the executor.
+    """
+    url = zone.API_MOBILE_ZONE_URL.format(
+        end_point=post.end_point, zone_id=zone.zone_id
+    )
+    # pylint: disable=protected-access
+    return zone._nexia_home.post_url(url, post.payload).json()["result"]
+
+
+def _restore_post_result(zone, post, result):
+    """Put back what a post changed from the zone json it responded with."""
+    # pylint: disable=protected-access
+    zone_json = zone._zone_json
+    for key in post.keys:
+        if key in result:
+            zone_json[key] = result[key]
+    _restore_items(zone_json, result, "settings", "type", post.settings)
+    _restore_items(zone_json, result, "features", "name", post.features)
+
+
+def _restore_items(zone_json, result, list_key, field, names):
+    """Put back the named items of a zone json list from a result."""
+    if not names:
+        return
+    restored = {
+        item.get(field): item
+        for item in result.get(list_key) or ()
+        if item.get(field) in names
+    }
+    items = zone_json.get(list_key) or []
+    for index, item in enumerate(items):
+        if item.get(field) in restored:
+            items[index] = restored[item.get(field)]
@@ -1,14 +1,27 @@
 """Config flow for Nexia integration."""
 import logging
 
-from nexia.home import NexiaHome
 from requests.exceptions import ConnectTimeout, HTTPError
 import voluptuous as vol
 
 from homeassistant import config_entries, core, exceptions
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
-
-from .const import DOMAIN  # pylint:disable=unused-import
+from homeassistant.core import callback
+
+from .auth import NexiaAuthHome
+from .const import (  # pylint:disable=unused-import
+    CONF_RETENTION,
+    CONF_STALE_BUDGET,
+    DEFAULT_RETENTION,
+    DEFAULT_STALE_BUDGET,
+    DOMAIN,
+    NEXIA_DEVICE,
+    RETENTION_COMPACT,
+    RETENTION_FULL,
+)
+from .executor import async_get_executor
+from .session import async_ensure_state_file, async_get_session_cache
+from .transport import attach_transport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -22,8 +35,9 @@ async def validate_input(hass: core.HomeAssistant, data):
     """
 
     state_file = hass.config.path(f"nexia_config_{data[CONF_USERNAME]}.conf")
+    await async_ensure_state_file(hass, state_file)
     try:
-        nexia_home = NexiaHome(
+        nexia_home = NexiaAuthHome(
             username=data[CONF_USERNAME],
             password=data[CONF_PASSWORD],
             auto_login=False,
@@ -31,7 +45,8 @@ async def validate_input(hass: core.HomeAssistant, data):
             device_name=hass.config.location_name,
             state_file=state_file,
         )
-        await hass.async_add_executor_job(nexia_home.login)
+        attach_transport(hass, nexia_home)
+        await async_get_executor(hass).async_add_executor_job(nexia_home.login)
     except ConnectTimeout as ex:
         _LOGGER.error("Unable to connect to Nexia service: %s", ex)
         raise CannotConnect
@@ -44,7 +59,7 @@ async def validate_input(hass: core.HomeAssistant, data):
     if not nexia_home.get_name():
         raise InvalidAuth
 
-    info = {"title": nexia_home.get_name(), "house_id": nexia_home.house_id}
+    info = {"title": data[CONF_USERNAME], NEXIA_DEVICE: nexia_home}
     _LOGGER.debug("Setup ok with info: %s", info)
     return info
 
@@ -52,7 +67,7 @@ async def validate_input(hass: core.HomeAssistant, data):
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     """Handle a config flow for Nexia."""
 
-    VERSION = 1
+    VERSION = 2
     CONNECTION_CLASS = config_entries.CONN_CLASS_CLOUD_POLL
 
     async def async_step_user(self, user_input=None):
@@ -70,8 +85,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors["base"] = "unknown"
 
             if "base" not in errors:
-                await self.async_set_unique_id(info["house_id"])
+                # One entry covers every house of the account
+                await self.async_set_unique_id(user_input[CONF_USERNAME])
                 self._abort_if_unique_id_configured()
+                # Let entry setup reuse this session instead of logging in again
+                sessions = await async_get_session_cache(self.hass)
+                await sessions.async_add(info[NEXIA_DEVICE])
                 return self.async_create_entry(title=info["title"], data=user_input)
 
         return self.async_show_form(
@@ -82,6 +101,42 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Handle import."""
         return await self.async_step_user(user_input)
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry):
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle a option flow for Nexia."""
+
+    def __init__(self, config_entry):
+        """Initialize options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None):
+        """Handle options flow."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        stale_budget = options.get(CONF_STALE_BUDGET, DEFAULT_STALE_BUDGET)
+        retention = options.get(CONF_RETENTION, DEFAULT_RETENTION)
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(CONF_STALE_BUDGET, default=stale_budget): vol.All(
+                        vol.Coerce(int), vol.Range(min=0)
+                    ),
+                    vol.Optional(CONF_RETENTION, default=retention): vol.In(
+                        [RETENTION_COMPACT, RETENTION_FULL]
+                    ),
+                }
+            ),
+        )
+
 
 class CannotConnect(exceptions.HomeAssistantError):
     """Error to indicate we cannot connect."""
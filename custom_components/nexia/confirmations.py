@@ -0,0 +1,155 @@
+"""Confirm that Nexia commands reach the thermostat."""
+from collections import namedtuple
+import logging
+import threading
+import time
+
+from homeassistant.core import callback
+
+from .const import (
+    ATTR_COMMAND,
+    ATTR_ELAPSED,
+    ATTR_HOUSE_ID,
+    ATTR_THERMOSTAT_ID,
+    ATTR_ZONE_ID,
+    EVENT_COMMAND_NOT_CONFIRMED,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+# A command the thermostat has not reported this long after it was
+# sent never converged. At the slowest cadence this spans two polls.
+CONFIRM_TIMEOUT = 1200
+
+# A command waiting for a poll to show it was applied. It is applied
+# once read() returns expected.
+PendingCommand = namedtuple(
+    "PendingCommand", ["command", "zone_id", "read", "expected", "started", "sent"]
+)
+
+
+class NexiaConfirmationStats:
+    """Apply latency and failures of the commands sent to one thermostat."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.confirmed = 0
+        self.unconfirmed = 0
+        self.last_latency = None
+        self.max_latency = None
+        self.total_latency = 0.0
+
+    def record_confirmed(self, latency):
+        """Count a command a poll showed applied."""
+        self.confirmed += 1
+        self.last_latency = latency
+        self.max_latency = max(self.max_latency or 0.0, latency)
+        self.total_latency += latency
+
+    def record_unconfirmed(self):
+        """Count a command that never showed up."""
+        self.unconfirmed += 1
+
+    @property
+    def average_latency(self):
+        """Return the mean seconds from sending a command to seeing it applied."""
+        if not self.confirmed:
+            return None
+        return self.total_latency / self.confirmed
+
+    @property
+    def failure_rate(self):
+        """Return the percentage of commands that never showed up."""
+        finished = self.confirmed + self.unconfirmed
+        if not finished:
+            return None
+        return 100.0 * self.unconfirmed / finished
+
+
+class NexiaCommandConfirmations:
+    """Track commands until a poll shows the thermostat applied them.
+
+    A command response only says the cloud accepted the command. It
+    is confirmed once a poll fetched after it was sent returns the
+    values it set, and given up on when that has not happened within
+    CONFIRM_TIMEOUT.
+    """
+
+    def __init__(self, hass, nexia_home):
+        """Initialize the tracker."""
+        self._hass = hass
+        self._nexia_home = nexia_home
+        self._lock = threading.Lock()
+        self._pending = {}
+        self.stats = {
+            thermostat_id: NexiaConfirmationStats()
+            for thermostat_id in nexia_home.get_thermostat_ids()
+        }
+
+    def track(self, thermostat_id, pending_command):
+        """Wait for a poll to confirm a command.
+
+        A pending command of the same kind for the same zone is
+        replaced since its values can no longer be seen.
+
+        This is called from the worker that sent the command.
+        """
+        key = (pending_command.command, pending_command.zone_id)
+        with self._lock:
+            pending = self._pending.setdefault(thermostat_id, {})
+            if key in pending:
+                _LOGGER.debug("%s superseded by a newer command", key)
+            pending[key] = pending_command
+
+    def pending_count(self, thermostat_id):
+        """Return the number of commands of a thermostat waiting to be confirmed."""
+        with self._lock:
+            return len(self._pending.get(thermostat_id, ()))
+
+    @callback
+    def async_update_thermostat(self, thermostat, coordinator):
+        """Confirm or give up on the commands of a refreshed thermostat."""
+        thermostat_id = thermostat.thermostat_id
+        now = time.monotonic()
+        polled_at = coordinator.polled_at
+        stats = self.stats[thermostat_id]
+        not_confirmed = []
+        with self._lock:
+            pending = self._pending.get(thermostat_id)
+            if not pending:
+                return
+            for key, command in list(pending.items()):
+                if (
+                    polled_at is not None
+                    and polled_at >= command.sent
+                    and command.read() == command.expected
+                ):
+                    del pending[key]
+                    stats.record_confirmed(now - command.started)
+                    _LOGGER.debug(
+                        "%s on %s confirmed after %.1f seconds",
+                        command.command,
+                        thermostat.get_name(),
+                        now - command.started,
+                    )
+                elif now - command.sent >= CONFIRM_TIMEOUT:
+                    del pending[key]
+                    stats.record_unconfirmed()
+                    not_confirmed.append(command)
+
+        for command in not_confirmed:
+            event_data = {
+                ATTR_HOUSE_ID: self._nexia_home.house_id,
+                ATTR_THERMOSTAT_ID: thermostat_id,
+                ATTR_COMMAND: command.command,
+                ATTR_ELAPSED: round(now - command.started),
+            }
+            if command.zone_id is not None:
+                event_data[ATTR_ZONE_ID] = command.zone_id
+            _LOGGER.warning(
+                "%s on %s was not confirmed after %s seconds",
+                command.command,
+                thermostat.get_name(),
+                event_data[ATTR_ELAPSED],
+            )
+            self._hass.bus.async_fire(EVENT_COMMAND_NOT_CONFIRMED, event_data)
@@ -8,9 +8,26 @@ NOTIFICATION_ID = "nexia_notification"
 NOTIFICATION_TITLE = "Nexia Setup"
 
 NEXIA_DEVICE = "device"
+NEXIA_SESSIONS = "sessions"
+DATA_TRANSPORT = "transport"
+DATA_LOOP_MONITOR = "loop_monitor"
+DATA_EXECUTOR = "executor"
 NEXIA_SCAN_INTERVAL = "scan_interval"
 
 DOMAIN = "nexia"
+
+CONF_LOOP_CALL_THRESHOLD = "loop_call_threshold"
+CONF_RECORD = "record"
+CONF_REPLAY = "replay"
+CONF_REPLAY_HOUSES = "replay_houses"
+CONF_REPLAY_SCALE = "replay_scale"
+CONF_REPLAY_SPEED = "replay_speed"
+CONF_RETENTION = "retention"
+RETENTION_COMPACT = "compact"
+RETENTION_FULL = "full"
+DEFAULT_RETENTION = RETENTION_COMPACT
+CONF_STALE_BUDGET = "stale_budget"
+DEFAULT_STALE_BUDGET = 15
 DEFAULT_ENTITY_NAMESPACE = "nexia"
 
 ATTR_DESCRIPTION = "description"
@@ -18,14 +35,66 @@ ATTR_DESCRIPTION = "description"
 ATTR_AIRCLEANER_MODE = "aircleaner_mode"
 
 ATTR_ZONE_STATUS = "zone_status"
-ATTR_HUMIDIFY_SUPPORTED = "humidify_supported"
-ATTR_DEHUMIDIFY_SUPPORTED = "dehumidify_supported"
 ATTR_HUMIDIFY_SETPOINT = "humidify_setpoint"
 ATTR_DEHUMIDIFY_SETPOINT = "dehumidify_setpoint"
 
+ATTR_HOUSE_ID = "house_id"
+ATTR_THERMOSTAT_ID = "thermostat_id"
+ATTR_ZONE_ID = "zone_id"
+ATTR_SETPOINT = "setpoint"
+ATTR_OLD_VALUE = "old_value"
+ATTR_NEW_VALUE = "new_value"
+ATTR_SKIPPED_COMMANDS = "skipped_commands"
+ATTR_SKIPPED_POLLS = "skipped_polls"
+ATTR_DISCARDED_POLLS = "discarded_polls"
+ATTR_STALE_BUDGET = "stale_budget"
+ATTR_SCHEDULE_COUNT = "schedule_count"
+ATTR_SCHEDULE_NAMES = "schedule_names"
+ATTR_EXPIRED_LOGINS = "expired_logins"
+ATTR_REFRESHED_LOGINS = "refreshed_logins"
+ATTR_LAST_LOGIN_DURATION = "last_login_duration"
+ATTR_TOTAL_LOGIN_DURATION = "total_login_duration"
+ATTR_SESSION_LIFETIME = "session_lifetime"
+ATTR_QUEUE_DEPTH = "queue_depth"
+ATTR_ACTIVE_WORKERS = "active_workers"
+ATTR_WORKERS = "workers"
+ATTR_SATURATED_JOBS = "saturated_jobs"
+ATTR_COMPLETED_JOBS = "completed_jobs"
+ATTR_MAX_WAIT = "max_wait"
+ATTR_COMMAND = "command"
+ATTR_ELAPSED = "elapsed"
+ATTR_AVERAGE_LATENCY = "average_latency"
+ATTR_MAX_LATENCY = "max_latency"
+ATTR_CONFIRMED_COMMANDS = "confirmed_commands"
+ATTR_UNCONFIRMED_COMMANDS = "unconfirmed_commands"
+ATTR_PENDING_COMMANDS = "pending_commands"
+ATTR_FAILURE_RATE = "failure_rate"
+
+SETPOINT_HEAT = "heat"
+SETPOINT_COOL = "cool"
+
 UPDATE_COORDINATOR = "update_coordinator"
+THERMOSTAT_COORDINATORS = "thermostat_coordinators"
+PAYLOAD_SIZE = "payload_size"
+TRANSITION_EVENTS = "transition_events"
+COMMAND_STATS = "command_stats"
+COMMAND_CONFIRMATIONS = "command_confirmations"
+SCHEDULER = "scheduler"
+SCHEDULE_CACHE = "schedule_cache"
+HOUSE_AGGREGATES = "house_aggregates"
+COORDINATORS = "coordinators"
+ON_UNLOAD = "on_unload"
+HOUSES = "houses"
 
 MANUFACTURER = "Trane"
 
 SIGNAL_ZONE_UPDATE = "NEXIA_CLIMATE_ZONE_UPDATE"
 SIGNAL_THERMOSTAT_UPDATE = "NEXIA_CLIMATE_THERMOSTAT_UPDATE"
+SIGNAL_SCHEDULE_UPDATE = "NEXIA_CLIMATE_SCHEDULE_UPDATE"
+SIGNAL_AGGREGATE_UPDATE = "NEXIA_CLIMATE_AGGREGATE_UPDATE"
+
+EVENT_ZONE_CALLING = "nexia_zone_calling"
+EVENT_SYSTEM_STATUS = "nexia_system_status"
+EVENT_BLOWER = "nexia_blower"
+EVENT_SETPOINT = "nexia_setpoint"
+EVENT_COMMAND_NOT_CONFIRMED = "nexia_command_not_confirmed"
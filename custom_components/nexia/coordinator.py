@@ -0,0 +1,209 @@
+"""Per-thermostat update coordinators for Nexia / Trane XL thermostats."""
+import asyncio
+from datetime import timedelta
+from functools import partial
+import logging
+import time
+
+from nexia.const import MOBILE_URL
+
+from homeassistant.core import callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.util.dt as dt_util
+
+from .cadence import NexiaCadence, thermostat_fingerprint, thermostat_updated_at
+from .executor import async_get_executor
+from .retention import LINKS_KEY, LINKS_SELF, compact_thermostat
+
+_LOGGER = logging.getLogger(__name__)
+
+THERMOSTAT_URL = MOBILE_URL + "/xxl_thermostats/{thermostat_id}"
+HTTP_NOT_MODIFIED = 304
+
+
+class NexiaUpdateCoordinator(DataUpdateCoordinator):
+    """A coordinator that keeps serving its last data through outages."""
+
+    def __init__(
+        self, hass, logger, *, name, update_method, update_interval, stale_budget
+    ):
+        """Initialize the coordinator.
+
+        The data is assumed to be fresh when the coordinator is
+        created since setup has just fetched it.
+        """
+        super().__init__(
+            hass,
+            logger,
+            name=name,
+            update_method=self._async_update_and_timestamp,
+            update_interval=update_interval,
+        )
+        self._fetch_method = update_method
+        self.stale_budget = stale_budget
+        self.last_success = dt_util.utcnow()
+        # Monotonic time the last poll whose data was applied started
+        self.polled_at = None
+        self._refresh_task = None
+        self._shutdown = False
+
+    async def async_refresh(self):
+        """Refresh in a task of its own so shutdown can cancel just that."""
+        if self._shutdown:
+            return
+        task = self._refresh_task
+        if task is None:
+            task = self._refresh_task = self.hass.async_create_task(
+                super().async_refresh()
+            )
+            task.add_done_callback(self._async_refresh_done)
+        try:
+            await asyncio.shield(task)
+        except asyncio.CancelledError:
+            # Only the caller being cancelled is passed on
+            if not task.cancelled():
+                raise
+
+    @callback
+    def _async_refresh_done(self, task):
+        """Forget a finished refresh."""
+        if self._refresh_task is task:
+            self._refresh_task = None
+
+    async def async_shutdown(self):
+        """Stop refreshing and cancel a refresh in flight."""
+        self._shutdown = True
+        self._debounced_refresh.async_cancel()
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+        task = self._refresh_task
+        if task is None:
+            return
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+
+    @callback
+    def _schedule_refresh(self):
+        """Schedule the next refresh unless shut down."""
+        if not self._shutdown:
+            super()._schedule_refresh()
+
+    async def _async_update_and_timestamp(self):
+        """Fetch the data and remember when it last succeeded."""
+        try:
+            data = await self._fetch_method()
+        except asyncio.CancelledError:
+            if not self._shutdown:
+                raise
+            # Python 3.7 would log a cancelled refresh as an error and
+            # mark the data failed, so it ends with the data unchanged
+            return self.data
+        self.last_success = dt_util.utcnow()
+        return data
+
+    @property
+    def data_age(self):
+        """Return the age of the last good data."""
+        return dt_util.utcnow() - self.last_success
+
+    @property
+    def available(self):
+        """Return True while the last good data is within the budget."""
+        return self.last_update_success or self.data_age <= self.stale_budget
+
+
+def thermostat_url(thermostat):
+    """Return the url the cloud serves a single thermostat from."""
+    # pylint: disable=protected-access
+    links = thermostat._thermostat_json.get(LINKS_KEY, {})
+    try:
+        return links[LINKS_SELF]["href"]
+    except (KeyError, TypeError):
+        return THERMOSTAT_URL.format(thermostat_id=thermostat.thermostat_id)
+
+
+def fetch_house(nexia_home):
+    """Fetch the house unless it is unchanged since the last fetch.
+
+    This does blocking I/O and should be run in the executor.
+    """
+    # pylint: disable=protected-access
+    headers = {}
+    if nexia_home._last_update_etag:
+        headers["If-None-Match"] = nexia_home._last_update_etag
+    return nexia_home._get_url(
+        nexia_home.API_MOBILE_HOUSES_URL.format(house_id=nexia_home.house_id),
+        headers=headers,
+    )
+
+
+def apply_house(nexia_home, response):
+    """Update the house from a response returned by fetch_house."""
+    if response.status_code == HTTP_NOT_MODIFIED:
+        return
+    nexia_home.update_from_json(response.json())
+    # pylint: disable=protected-access
+    nexia_home._last_update_etag = response.headers.get("etag")
+
+
+def fetch_thermostat(nexia_home, thermostat):
+    """Fetch one thermostat and its zones.
+
+    This does blocking I/O and should be run in the executor.
+    """
+    # pylint: disable=protected-access
+    return nexia_home._get_url(thermostat_url(thermostat)).json()["result"]
+
+
+def apply_thermostat(thermostat, thermostat_json):
+    """Update a thermostat from the json returned by fetch_thermostat."""
+    thermostat.update_thermostat_json(thermostat_json)
+    compact_thermostat(thermostat)
+
+
+def create_thermostat_coordinator(
+    hass, nexia_home, thermostat, sessions, scheduler, interval, stale_budget
+):
+    """Return a coordinator that only refreshes one thermostat.
+
+    A slow or failing thermostat then only delays and marks
+    unavailable its own entities.
+    """
+
+    cadence = NexiaCadence(thermostat.get_name(), timedelta(seconds=interval))
+
+    def _poll():
+        """Refresh the thermostat and learn whether the data was fresh."""
+        polled_at = time.monotonic()
+        if not scheduler.poll(
+            thermostat.get_name(),
+            partial(fetch_thermostat, nexia_home, thermostat),
+            partial(apply_thermostat, thermostat),
+        ):
+            return
+        coordinator.polled_at = polled_at
+        updated_at = thermostat_updated_at(thermostat)
+        if updated_at is None:
+            cadence.observe(None, thermostat_fingerprint(thermostat))
+        else:
+            cadence.observe(updated_at)
+
+    async def _async_update_data():
+        """Fetch data from API endpoint."""
+        try:
+            await async_get_executor(hass).async_add_executor_job(_poll)
+        finally:
+            coordinator.update_interval = cadence.next_poll_delay()
+        # The library logs in again when the session has expired
+        await sessions.async_save_tokens(nexia_home)
+
+    coordinator = NexiaUpdateCoordinator(
+        hass,
+        _LOGGER,
+        name=f"Nexia {thermostat.get_name()} update",
+        update_method=_async_update_data,
+        update_interval=timedelta(seconds=interval),
+        stale_budget=stale_budget,
+    )
+    return coordinator
@@ -1,11 +1,13 @@
 """The nexia integration base entity."""
 
 from homeassistant.const import ATTR_ATTRIBUTION
+from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity import Entity
 
 from .const import (
     ATTRIBUTION,
+    DATA_LOOP_MONITOR,
     DOMAIN,
     MANUFACTURER,
     SIGNAL_THERMOSTAT_UPDATE,
@@ -26,7 +28,7 @@ class NexiaEntity(Entity):
     @property
     def available(self):
         """Return True if entity is available."""
-        return self._coordinator.last_update_success
+        return self._coordinator.available
 
     @property
     def unique_id(self):
@@ -41,9 +43,7 @@ class NexiaEntity(Entity):
     @property
     def device_state_attributes(self):
         """Return the device specific state attributes."""
-        return {
-            ATTR_ATTRIBUTION: ATTRIBUTION,
-        }
+        return {}
 
     @property
     def should_poll(self):
@@ -52,11 +52,48 @@ class NexiaEntity(Entity):
 
     async def async_added_to_hass(self):
         """Subscribe to updates."""
-        self._coordinator.async_add_listener(self.async_write_ha_state)
+        loop_monitor = self.hass.data[DOMAIN].get(DATA_LOOP_MONITOR)
+        if loop_monitor:
+            loop_monitor.async_wrap_entity(self)
+        self._coordinator.async_add_listener(self._async_handle_coordinator_update)
 
     async def async_will_remove_from_hass(self):
         """Undo subscription."""
-        self._coordinator.async_remove_listener(self.async_write_ha_state)
+        self._coordinator.async_remove_listener(self._async_handle_coordinator_update)
+
+    @callback
+    def _async_handle_coordinator_update(self):
+        """Write the state after the coordinator refreshed."""
+        self.async_write_ha_state()
+
+
+class NexiaHouseEntity(NexiaEntity):
+    """Base class for nexia entities attached to the house."""
+
+    def __init__(self, coordinator, nexia_home, name, unique_id):
+        """Initialize the entity."""
+        super().__init__(coordinator, name, unique_id)
+        self._nexia_home = nexia_home
+
+    @property
+    def device_info(self):
+        """Return the device_info of the device."""
+        return {
+            "identifiers": {(DOMAIN, self._nexia_home.house_id)},
+            "name": self._nexia_home.get_name(),
+            "manufacturer": MANUFACTURER,
+        }
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes.
+
+        Attribution is only carried by the house entities so it is
+        not repeated in every thermostat and zone state.
+        """
+        return {
+            ATTR_ATTRIBUTION: ATTRIBUTION,
+        }
 
 
 class NexiaThermostatEntity(NexiaEntity):
@@ -0,0 +1,95 @@
+"""Transition events for Nexia / Trane XL thermostats."""
+import logging
+
+from homeassistant.core import callback
+
+from .const import (
+    ATTR_HOUSE_ID,
+    ATTR_NEW_VALUE,
+    ATTR_OLD_VALUE,
+    ATTR_SETPOINT,
+    ATTR_THERMOSTAT_ID,
+    ATTR_ZONE_ID,
+    EVENT_BLOWER,
+    EVENT_SETPOINT,
+    EVENT_SYSTEM_STATUS,
+    EVENT_ZONE_CALLING,
+    SETPOINT_COOL,
+    SETPOINT_HEAT,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def thermostat_snapshot(thermostat):
+    """Return the values we fire transition events for.
+
+    Keys are (event_type, thermostat_id, zone_id, setpoint) so a
+    diff of two snapshots maps directly to the events to fire.
+    """
+    tid = thermostat.thermostat_id
+    snapshot = {
+        (EVENT_SYSTEM_STATUS, tid, None, None): thermostat.get_system_status(),
+        (EVENT_BLOWER, tid, None, None): thermostat.is_blower_active(),
+    }
+    for zone in thermostat.zones:
+        zid = zone.zone_id
+        heat, cool = zone.get_heating_setpoint(), zone.get_cooling_setpoint()
+        snapshot[(EVENT_ZONE_CALLING, tid, zid, None)] = zone.is_calling()
+        snapshot[(EVENT_SETPOINT, tid, zid, SETPOINT_HEAT)] = heat
+        snapshot[(EVENT_SETPOINT, tid, zid, SETPOINT_COOL)] = cool
+    return snapshot
+
+
+def snapshot_changes(old_snapshot, new_snapshot):
+    """Yield the keys and values that differ between two snapshots."""
+    for key, new_value in new_snapshot.items():
+        if key not in old_snapshot:
+            continue
+        old_value = old_snapshot[key]
+        if old_value != new_value:
+            yield key, old_value, new_value
+
+
+class NexiaTransitionEvents:
+    """Fire nexia_* events from the diff between consecutive refreshes.
+
+    A snapshot is kept per thermostat so a thermostat refresh only
+    reads the thermostat that was refreshed.
+    """
+
+    def __init__(self, hass, nexia_home):
+        """Initialize with the current state as the baseline."""
+        self._hass = hass
+        self._nexia_home = nexia_home
+        self._snapshots = {
+            thermostat.thermostat_id: thermostat_snapshot(thermostat)
+            for thermostat in nexia_home.thermostats or ()
+        }
+
+    @callback
+    def async_update(self):
+        """Compare every refreshed thermostat to the last refresh."""
+        for thermostat in self._nexia_home.thermostats or ():
+            self.async_update_thermostat(thermostat)
+
+    @callback
+    def async_update_thermostat(self, thermostat):
+        """Compare one refreshed thermostat to the last refresh and fire events."""
+        snapshot = thermostat_snapshot(thermostat)
+        old_snapshot = self._snapshots.get(thermostat.thermostat_id, {})
+        for key, old_value, new_value in snapshot_changes(old_snapshot, snapshot):
+            event_type, thermostat_id, zone_id, setpoint = key
+            event_data = {
+                ATTR_HOUSE_ID: self._nexia_home.house_id,
+                ATTR_THERMOSTAT_ID: thermostat_id,
+                ATTR_OLD_VALUE: old_value,
+                ATTR_NEW_VALUE: new_value,
+            }
+            if zone_id is not None:
+                event_data[ATTR_ZONE_ID] = zone_id
+            if setpoint is not None:
+                event_data[ATTR_SETPOINT] = setpoint
+            _LOGGER.debug("Firing %s: %s", event_type, event_data)
+            self._hass.bus.async_fire(event_type, event_data)
+        self._snapshots[thermostat.thermostat_id] = snapshot
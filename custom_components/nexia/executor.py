@@ -0,0 +1,110 @@
+"""Dedicated worker pool for blocking Nexia I/O."""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DATA_EXECUTOR, DOMAIN
+
+# Bounded so a burst of commands or a slow cloud cannot take over the
+# shared Home Assistant executor, and so their work cannot starve ours.
+MAX_WORKERS = 8
+
+
+@callback
+def async_get_executor(hass: HomeAssistant):
+    """Return the Nexia worker pool shared by every config entry."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    executor = domain_data.get(DATA_EXECUTOR)
+    if executor is None:
+        executor = domain_data[DATA_EXECUTOR] = NexiaExecutor(hass, MAX_WORKERS)
+
+        async def _async_shutdown(_event):
+            await executor.async_shutdown()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, _async_shutdown)
+    return executor
+
+
+class NexiaExecutor:
+    """A bounded thread pool that measures how busy it is.
+
+    A job is saturated when every worker was busy as it was queued,
+    so it had to wait for one to free up.
+
+    Jobs are tracked by Home Assistant, so async_block_till_done waits
+    for them. Once the pool is shut down, jobs still submitted by
+    refreshes and commands finishing up run in the Home Assistant
+    executor instead.
+    """
+
+    def __init__(self, hass: HomeAssistant, max_workers):
+        """Initialize the pool."""
+        self._hass = hass
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="nexia"
+        )
+        self._lock = threading.Lock()
+        self._jobs = set()
+        self._shutdown = False
+        self.max_workers = max_workers
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.active = 0
+        self.completed = 0
+        self.saturated = 0
+        self.max_wait = 0.0
+
+    @callback
+    def async_add_executor_job(self, target, *args):
+        """Run a blocking function in the pool and return an awaitable."""
+        if self._shutdown:
+            return self._hass.async_add_executor_job(target, *args)
+        with self._lock:
+            if self.active + self.queue_depth >= self.max_workers:
+                self.saturated += 1
+            self.queue_depth += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            job = self._pool.submit(self._run, time.monotonic(), target, args)
+            self._jobs.add(job)
+        job.add_done_callback(self._job_done)
+        return self._hass.async_add_job(_async_result(job))
+
+    async def async_shutdown(self):
+        """Stop taking jobs and wait for the ones submitted to finish."""
+        self._shutdown = True
+        with self._lock:
+            jobs = [asyncio.wrap_future(job) for job in self._jobs]
+        if jobs:
+            await asyncio.wait(jobs)
+        self._pool.shutdown(wait=False)
+
+    def _job_done(self, job):
+        """Forget a finished job."""
+        with self._lock:
+            self._jobs.discard(job)
+            if job.cancelled():
+                # Cancelled while it was queued
+                self.queue_depth -= 1
+
+    def _run(self, queued_at, target, args):
+        """Run a job, keeping the counters."""
+        wait = time.monotonic() - queued_at
+        with self._lock:
+            self.queue_depth -= 1
+            self.active += 1
+            self.max_wait = max(self.max_wait, wait)
+        try:
+            return target(*args)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+
+async def _async_result(job):
+    """Return the result of a pool job."""
+    return await asyncio.wrap_future(job)
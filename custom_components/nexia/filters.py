@@ -0,0 +1,46 @@
+"""Significant-change filtering for Nexia sensors."""
+import time
+
+
+class SignificantChangeFilter:
+    """Hold back small changes of a numeric value.
+
+    A new value is published when it moves at least threshold away
+    from the last published one, or when it differs and heartbeat
+    seconds have passed since the last publish, so slow drifts still
+    reach the recorder.
+    """
+
+    def __init__(self, threshold, heartbeat):
+        """Initialize the filter."""
+        self._threshold = threshold
+        self._heartbeat = heartbeat
+        self._published_at = None
+        self.value = None
+
+    def reset(self):
+        """Publish the next value no matter what."""
+        self._published_at = None
+
+    def accept(self, value):
+        """Return True if value should be published."""
+        now = time.monotonic()
+        if not self._is_significant(value, now):
+            return False
+        self.value = value
+        self._published_at = now
+        return True
+
+    def _is_significant(self, value, now):
+        """Return True if value differs enough from the published one."""
+        if self._published_at is None:
+            return True
+        if value == self.value:
+            return False
+        if not isinstance(value, (int, float)) or not isinstance(
+            self.value, (int, float)
+        ):
+            return True
+        if abs(value - self.value) >= self._threshold:
+            return True
+        return now - self._published_at >= self._heartbeat
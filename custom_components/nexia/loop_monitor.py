@@ -0,0 +1,159 @@
+"""Detect slow nexia library calls made on the event loop."""
+from datetime import timedelta
+import logging
+import sys
+import threading
+import time
+
+from homeassistant.core import callback
+from homeassistant.helpers.event import async_track_time_interval
+
+_LOGGER = logging.getLogger(__name__)
+
+SUMMARY_INTERVAL = timedelta(minutes=10)
+SUMMARY_SIZE = 10
+
+# Entity attributes that hold nexia library objects
+WRAPPED_ATTRIBUTES = ("_automation", "_nexia_home", "_thermostat", "_zone")
+
+
+class NexiaLoopCallMonitor:
+    """Time every library call entities make on the event loop."""
+
+    def __init__(self, hass, threshold):
+        """Initialize the monitor.
+
+        Must be created on the event loop. Calls that take longer
+        than threshold seconds are logged as they happen.
+        """
+        self._hass = hass
+        self._threshold = threshold
+        self._loop_thread_id = threading.get_ident()
+        self._call_sites = {}
+        self._unsub_summary = None
+
+    @callback
+    def async_start(self):
+        """Start logging a summary of the slowest call sites."""
+        self._unsub_summary = async_track_time_interval(
+            self._hass, self._async_log_summary, SUMMARY_INTERVAL
+        )
+
+    @callback
+    def async_stop(self):
+        """Stop logging summaries."""
+        if self._unsub_summary:
+            self._unsub_summary()
+            self._unsub_summary = None
+
+    @callback
+    def async_wrap_entity(self, entity):
+        """Replace the library objects of an entity with timing proxies."""
+        for attribute in WRAPPED_ATTRIBUTES:
+            obj = getattr(entity, attribute, None)
+            if obj is not None and not isinstance(obj, _TimedProxy):
+                setattr(entity, attribute, _TimedProxy(obj, entity, self))
+
+    def in_loop(self):
+        """Return True if called from the event loop thread."""
+        return threading.get_ident() == self._loop_thread_id
+
+    def record(self, entity, prop, call, elapsed):
+        """Record one library call made on the event loop."""
+        key = (entity.entity_id, prop, call)
+        site = self._call_sites.get(key)
+        if site is None:
+            site = self._call_sites[key] = _CallSite()
+        site.add(elapsed, elapsed > self._threshold)
+        if elapsed > self._threshold:
+            _LOGGER.warning(
+                "%s.%s blocked the event loop for %.1f ms in %s",
+                entity.entity_id,
+                prop,
+                elapsed * 1000,
+                call,
+            )
+
+    def slowest_call_sites(self, limit=SUMMARY_SIZE):
+        """Return the call sites with the slowest single call first."""
+        return sorted(
+            self._call_sites.items(), key=lambda item: item[1].max, reverse=True
+        )[:limit]
+
+    @callback
+    def _async_log_summary(self, _now):
+        """Log the slowest call sites."""
+        sites = self.slowest_call_sites()
+        if not sites:
+            return
+        _LOGGER.warning(
+            "Slowest nexia calls on the event loop:\n%s",
+            "\n".join(
+                f"  {entity_id}.{prop} -> {call}: {site}"
+                for (entity_id, prop, call), site in sites
+            ),
+        )
+
+
+class _CallSite:
+    """Timings of one library call made from one entity property."""
+
+    __slots__ = ("count", "slow", "total", "max")
+
+    def __init__(self):
+        """Initialize the timings."""
+        self.count = 0
+        self.slow = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, elapsed, slow):
+        """Add one call."""
+        self.count += 1
+        self.slow += slow
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+
+    def __str__(self):
+        """Return a one line summary."""
+        return (
+            f"{self.count} calls, {self.slow} slow, "
+            f"max {self.max * 1000:.3f} ms, "
+            f"mean {self.total / self.count * 1000:.3f} ms"
+        )
+
+
+class _TimedProxy:
+    """Time calls on a library object made from the event loop."""
+
+    __slots__ = ("_obj", "_entity", "_monitor")
+
+    def __init__(self, obj, entity, monitor):
+        """Wrap obj for entity."""
+        self._obj = obj
+        self._entity = entity
+        self._monitor = monitor
+
+    def __getattr__(self, name):
+        """Return the attribute, timing it when it is a method."""
+        value = getattr(self._obj, name)
+        if not callable(value):
+            return value
+        monitor = self._monitor
+        entity = self._entity
+
+        def _timed_call(*args, **kwargs):
+            if not monitor.in_loop():
+                return value(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return value(*args, **kwargs)
+            finally:
+                monitor.record(
+                    entity,
+                    sys._getframe(1).f_code.co_name,  # pylint: disable=protected-access
+                    name,
+                    time.perf_counter() - start,
+                )
+
+        return _timed_call
@@ -0,0 +1,115 @@
+"""Memory-lean retention of Nexia house data."""
+import sys
+
+# Parts of the house JSON that neither the library getters
+# nor the platforms ever read.
+AUTOMATION_KEYS = ("id", "name", "description", "enabled")
+THERMOSTAT_UNUSED_KEYS = (
+    "icon",
+    "name_editable",
+    "status_secondary",
+    "status_tertiary",
+    "delta",
+)
+THERMOSTAT_UNUSED_FEATURES = ("connection", "group", "runtime_history")
+ZONE_UNUSED_KEYS = ("icon",)
+ZONE_UNUSED_FEATURES = ("connection",)
+LINKS_KEY = "_links"
+LINKS_SELF = "self"
+
+
+def compact_house(nexia_home):
+    """Drop the raw house payload and the unread parts of the device JSON.
+
+    Returns the size of the house JSON still retained.
+
+    This does blocking work and should be run in the executor.
+    """
+    # The library keeps the last raw device and automation lists
+    # around even though every object has its own copy.
+    nexia_home.devices_json = None
+    nexia_home.automations_json = None
+
+    for thermostat in nexia_home.thermostats or ():
+        compact_thermostat(thermostat)
+
+    for automation in nexia_home.automations or ():
+        # pylint: disable=protected-access
+        automation_json = automation._automation_json
+        _drop_keys(
+            automation_json,
+            [key for key in automation_json if key not in AUTOMATION_KEYS],
+        )
+
+    return house_payload_size(nexia_home)
+
+
+def compact_thermostat(thermostat):
+    """Drop the unread parts of the thermostat and zone JSON."""
+    # pylint: disable=protected-access
+    thermostat_json = thermostat._thermostat_json
+    _drop_keys(thermostat_json, THERMOSTAT_UNUSED_KEYS)
+    _drop_features(thermostat_json, THERMOSTAT_UNUSED_FEATURES)
+    _compact_links(thermostat_json)
+    # Updates replace the zones list with a fresh copy while the
+    # zones keep updating their own dicts, so share those instead.
+    if thermostat.zones:
+        thermostat_json["zones"] = [zone._zone_json for zone in thermostat.zones]
+    for zone in thermostat.zones:
+        _drop_keys(zone._zone_json, ZONE_UNUSED_KEYS)
+        _drop_features(zone._zone_json, ZONE_UNUSED_FEATURES)
+        _compact_links(zone._zone_json)
+
+
+def house_payload_size(nexia_home):
+    """Return the number of bytes of house JSON the library retains.
+
+    This is the size of the parsed payloads only, not of the library
+    objects wrapping them or of anything else the entry holds.
+    """
+    # pylint: disable=protected-access
+    roots = [nexia_home.devices_json, nexia_home.automations_json]
+    roots.extend(
+        thermostat._thermostat_json for thermostat in nexia_home.thermostats or ()
+    )
+    roots.extend(
+        automation._automation_json for automation in nexia_home.automations or ()
+    )
+    return _deep_sizeof(roots, set())
+
+
+def _drop_keys(data, keys):
+    """Remove keys from a dict if they are present."""
+    for key in keys:
+        data.pop(key, None)
+
+
+def _drop_features(data, names):
+    """Remove the named entries from the features list."""
+    features = data.get("features")
+    if features:
+        data["features"] = [
+            feature for feature in features if feature.get("name") not in names
+        ]
+
+
+def _compact_links(data):
+    """Keep only the self link."""
+    links = data.get(LINKS_KEY)
+    if links and len(links) > 1 and LINKS_SELF in links:
+        data[LINKS_KEY] = {LINKS_SELF: links[LINKS_SELF]}
+
+
+def _deep_sizeof(obj, seen):
+    """Return the size of a JSON structure counting shared objects once."""
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += _deep_sizeof(key, seen) + _deep_sizeof(value, seen)
+    elif isinstance(obj, list):
+        for value in obj:
+            size += _deep_sizeof(value, seen)
+    return size
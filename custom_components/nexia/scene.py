@@ -3,8 +3,16 @@
 from homeassistant.components.scene import Scene
 from homeassistant.helpers.event import async_call_later
 
-from .const import ATTR_DESCRIPTION, DOMAIN, NEXIA_DEVICE, UPDATE_COORDINATOR
+from .const import (
+    ATTR_DESCRIPTION,
+    DOMAIN,
+    HOUSES,
+    NEXIA_DEVICE,
+    SCHEDULER,
+    UPDATE_COORDINATOR,
+)
 from .entity import NexiaEntity
+from .executor import async_get_executor
 
 SCENE_ACTIVATION_TIME = 5
 
@@ -12,16 +20,18 @@ SCENE_ACTIVATION_TIME = 5
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up automations for a Nexia device."""
 
-    nexia_data = hass.data[DOMAIN][config_entry.entry_id]
-    nexia_home = nexia_data[NEXIA_DEVICE]
-    coordinator = nexia_data[UPDATE_COORDINATOR]
     entities = []
+    for nexia_data in hass.data[DOMAIN][config_entry.entry_id][HOUSES].values():
+        nexia_home = nexia_data[NEXIA_DEVICE]
+        coordinator = nexia_data[UPDATE_COORDINATOR]
 
-    # Automation switches
-    for automation_id in nexia_home.get_automation_ids():
-        automation = nexia_home.get_automation_by_id(automation_id)
+        # Automation switches
+        for automation_id in nexia_home.get_automation_ids():
+            automation = nexia_home.get_automation_by_id(automation_id)
 
-        entities.append(NexiaAutomationScene(coordinator, automation))
+            entities.append(
+                NexiaAutomationScene(coordinator, automation, nexia_data[SCHEDULER])
+            )
 
     async_add_entities(entities, True)
 
@@ -29,12 +39,14 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
 class NexiaAutomationScene(NexiaEntity, Scene):
     """Provides Nexia automation support."""
 
-    def __init__(self, coordinator, automation):
+    def __init__(self, coordinator, automation, scheduler):
         """Initialize the automation scene."""
         super().__init__(
             coordinator, name=automation.name, unique_id=automation.automation_id,
         )
         self._automation = automation
+        self._scheduler = scheduler
+        self._unsub_refresh = None
 
     @property
     def device_state_attributes(self):
@@ -50,9 +62,26 @@ class NexiaAutomationScene(NexiaEntity, Scene):
 
     async def async_activate(self):
         """Activate an automation scene."""
-        await self.hass.async_add_executor_job(self._automation.activate)
+        await async_get_executor(self.hass).async_add_executor_job(self._activate)
 
         async def refresh_callback(_):
+            self._unsub_refresh = None
             await self._coordinator.async_refresh()
 
-        async_call_later(self.hass, SCENE_ACTIVATION_TIME, refresh_callback)
+        if self._unsub_refresh:
+            self._unsub_refresh()
+        self._unsub_refresh = async_call_later(
+            self.hass, SCENE_ACTIVATION_TIME, refresh_callback
+        )
+
+    async def async_will_remove_from_hass(self):
+        """Cancel a pending refresh."""
+        await super().async_will_remove_from_hass()
+        if self._unsub_refresh:
+            self._unsub_refresh()
+            self._unsub_refresh = None
+
+    def _activate(self):
+        """Activate the automation ahead of any poll."""
+        with self._scheduler.command():
+            self._automation.activate()
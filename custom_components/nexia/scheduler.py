@@ -0,0 +1,69 @@
+"""Give Nexia commands priority over background polls."""
+from contextlib import contextmanager
+import logging
+import threading
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class NexiaScheduler:
+    """Order commands and polls made against one account.
+
+    Commands always run right away. A poll only fetches when no
+    command is in flight and only applies what it fetched when no
+    command started since, so a poll can never overwrite a command
+    with data the cloud produced before the command.
+    """
+
+    def __init__(self):
+        """Initialize the scheduler."""
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._commands_in_flight = 0
+        self._closed = False
+        self.skipped_polls = 0
+        self.discarded_polls = 0
+
+    def close(self):
+        """Skip every later poll and discard the ones in flight."""
+        with self._lock:
+            self._closed = True
+
+    @contextmanager
+    def command(self):
+        """Run a user command ahead of any poll."""
+        with self._lock:
+            self._generation += 1
+            self._commands_in_flight += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._generation += 1
+                self._commands_in_flight -= 1
+
+    def poll(self, name, fetch, apply):
+        """Fetch and apply a background refresh.
+
+        Returns False if the poll was skipped or its result discarded.
+
+        This does blocking I/O and should be run in the executor.
+        """
+        with self._lock:
+            if self._closed:
+                return False
+            if self._commands_in_flight:
+                self.skipped_polls += 1
+                _LOGGER.debug("Skipping %s poll, a command is in flight", name)
+                return False
+            generation = self._generation
+        data = fetch()
+        with self._lock:
+            if self._closed:
+                return False
+            if generation != self._generation:
+                self.discarded_polls += 1
+                _LOGGER.debug("Discarding %s poll, a command superseded it", name)
+                return False
+            apply(data)
+        return True
@@ -0,0 +1,179 @@
+"""Locally cached zone schedules for Nexia / Trane XL thermostats."""
+import asyncio
+from datetime import timedelta
+import hashlib
+import json
+import logging
+
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.storage import Store
+import homeassistant.util.dt as dt_util
+
+from .const import DOMAIN, SIGNAL_SCHEDULE_UPDATE
+from .executor import async_get_executor
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.schedules"
+STORAGE_VERSION = 1
+
+SCHEDULE_SYNC_INTERVAL = timedelta(hours=1)
+
+SCHEDULE_FEATURE = "schedule"
+SCHEDULE_URL = "collection_url"
+HTTP_NOT_MODIFIED = 304
+
+KEY_CHANGED_AT = "changed_at"
+KEY_ETAG = "etag"
+KEY_FINGERPRINT = "fingerprint"
+KEY_SCHEDULE = "schedule"
+
+
+def zone_schedule_url(zone):
+    """Return the url of the schedules of a zone or None."""
+    # pylint: disable=protected-access
+    for feature in zone._zone_json.get("features", ()):
+        if feature.get("name") == SCHEDULE_FEATURE:
+            return feature.get(SCHEDULE_URL)
+    return None
+
+
+def schedule_store(hass, entry_id, house_id):
+    """Return the store the schedules of a house are cached in."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}.{house_id}")
+
+
+def schedule_names(schedule):
+    """Return the names of the schedules in a cached schedule payload."""
+    items = schedule.get("items") if isinstance(schedule, dict) else schedule
+    if not isinstance(items, list):
+        return []
+    return [
+        item["name"] for item in items if isinstance(item, dict) and item.get("name")
+    ]
+
+
+def _fingerprint(schedule):
+    """Return a stable digest of a schedule."""
+    return hashlib.sha1(
+        json.dumps(schedule, sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+class NexiaScheduleCache:
+    """Zone schedules kept in storage and re-synced only when they change.
+
+    The cloud is asked with the last ETag so an unchanged schedule
+    costs a 304 and no parsing, and a schedule whose content did not
+    change does not notify the entities.
+    """
+
+    def __init__(self, hass, nexia_home, scheduler, entry_id):
+        """Initialize the cache."""
+        self._hass = hass
+        self._nexia_home = nexia_home
+        self._scheduler = scheduler
+        self._store = schedule_store(hass, entry_id, nexia_home.house_id)
+        self._schedules = {}
+        self._dirty = False
+        self._unsub_sync = None
+        self._sync_task = None
+
+    async def async_load(self):
+        """Load the cached schedules."""
+        self._schedules = await self._store.async_load() or {}
+
+    @callback
+    def async_start(self):
+        """Sync now and then periodically."""
+        self._sync_task = self._hass.async_create_task(self.async_sync())
+        self._unsub_sync = async_track_time_interval(
+            self._hass, self._async_sync_interval, SCHEDULE_SYNC_INTERVAL
+        )
+
+    @callback
+    def async_stop(self):
+        """Stop syncing."""
+        if self._unsub_sync:
+            self._unsub_sync()
+            self._unsub_sync = None
+        if self._sync_task:
+            self._sync_task.cancel()
+            self._sync_task = None
+
+    def get_schedule(self, zone_id):
+        """Return the cached schedule of a zone or None."""
+        return self._schedules.get(str(zone_id), {}).get(KEY_SCHEDULE)
+
+    def get_changed_at(self, zone_id):
+        """Return when the schedule of a zone last changed or None."""
+        changed_at = self._schedules.get(str(zone_id), {}).get(KEY_CHANGED_AT)
+        return changed_at and dt_util.parse_datetime(changed_at)
+
+    async def _async_sync_interval(self, _now):
+        """Sync on the interval."""
+        self._sync_task = self._hass.async_create_task(self.async_sync())
+
+    async def async_sync(self, zone_ids=None):
+        """Fetch the schedules that changed since the last sync."""
+        changed = []
+        for thermostat in self._nexia_home.thermostats or ():
+            for zone in thermostat.zones:
+                if zone_ids is not None and zone.zone_id not in zone_ids:
+                    continue
+                url = zone_schedule_url(zone)
+                if url is None:
+                    continue
+                try:
+                    if await async_get_executor(self._hass).async_add_executor_job(
+                        self._sync_zone, zone.zone_id, url
+                    ):
+                        changed.append(zone.zone_id)
+                except asyncio.CancelledError:
+                    # Python 3.7 would swallow it below and sync on
+                    raise
+                except Exception as ex:  # pylint: disable=broad-except
+                    _LOGGER.debug("Unable to sync schedule of %s: %s", zone.zone_id, ex)
+
+        if self._dirty:
+            self._dirty = False
+            self._store.async_delay_save(lambda: self._schedules, 1)
+        for zone_id in changed:
+            async_dispatcher_send(self._hass, f"{SIGNAL_SCHEDULE_UPDATE}-{zone_id}")
+
+    def _sync_zone(self, zone_id, url):
+        """Fetch one schedule and return True if it changed.
+
+        This does blocking I/O and should be run in the executor.
+        """
+        cached = self._schedules.get(str(zone_id), {})
+        changed = []
+
+        def _fetch():
+            # pylint: disable=protected-access
+            headers = {}
+            if cached.get(KEY_ETAG):
+                headers["If-None-Match"] = cached[KEY_ETAG]
+            return self._nexia_home._get_url(url, headers=headers)
+
+        def _apply(response):
+            if response.status_code == HTTP_NOT_MODIFIED:
+                return
+            schedule = response.json().get("result")
+            fingerprint = _fingerprint(schedule)
+            entry = {
+                KEY_ETAG: response.headers.get("etag"),
+                KEY_FINGERPRINT: fingerprint,
+                KEY_SCHEDULE: schedule,
+                KEY_CHANGED_AT: cached.get(KEY_CHANGED_AT),
+            }
+            if fingerprint != cached.get(KEY_FINGERPRINT):
+                entry[KEY_CHANGED_AT] = dt_util.utcnow().isoformat()
+                changed.append(zone_id)
+            self._schedules[str(zone_id)] = entry
+            self._dirty = True
+
+        self._scheduler.poll(f"{zone_id} schedule", _fetch, _apply)
+        return bool(changed)
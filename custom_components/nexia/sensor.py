@@ -3,28 +3,156 @@
 from nexia.const import UNIT_CELSIUS
 
 from homeassistant.const import (
+    DATA_KIBIBYTES,
     DEVICE_CLASS_HUMIDITY,
     DEVICE_CLASS_TEMPERATURE,
+    DEVICE_CLASS_TIMESTAMP,
     TEMP_CELSIUS,
     TEMP_FAHRENHEIT,
+    TIME_SECONDS,
 )
+from homeassistant.core import callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
 
-from .const import DOMAIN, NEXIA_DEVICE, UPDATE_COORDINATOR
-from .entity import NexiaThermostatEntity, NexiaThermostatZoneEntity
+from .const import (
+    ATTR_ACTIVE_WORKERS,
+    ATTR_AVERAGE_LATENCY,
+    ATTR_COMPLETED_JOBS,
+    ATTR_CONFIRMED_COMMANDS,
+    ATTR_DISCARDED_POLLS,
+    ATTR_EXPIRED_LOGINS,
+    ATTR_FAILURE_RATE,
+    ATTR_LAST_LOGIN_DURATION,
+    ATTR_MAX_LATENCY,
+    ATTR_MAX_WAIT,
+    ATTR_PENDING_COMMANDS,
+    ATTR_QUEUE_DEPTH,
+    ATTR_REFRESHED_LOGINS,
+    ATTR_SATURATED_JOBS,
+    ATTR_SCHEDULE_COUNT,
+    ATTR_SCHEDULE_NAMES,
+    ATTR_SESSION_LIFETIME,
+    ATTR_SKIPPED_COMMANDS,
+    ATTR_SKIPPED_POLLS,
+    ATTR_STALE_BUDGET,
+    ATTR_TOTAL_LOGIN_DURATION,
+    ATTR_UNCONFIRMED_COMMANDS,
+    ATTR_WORKERS,
+    COMMAND_CONFIRMATIONS,
+    COMMAND_STATS,
+    DOMAIN,
+    HOUSES,
+    HOUSE_AGGREGATES,
+    NEXIA_DEVICE,
+    PAYLOAD_SIZE,
+    SCHEDULE_CACHE,
+    SCHEDULER,
+    SIGNAL_SCHEDULE_UPDATE,
+    THERMOSTAT_COORDINATORS,
+    UPDATE_COORDINATOR,
+)
+from .auth import LOGIN_EXPIRED, LOGIN_REFRESH
+from .entity import NexiaHouseEntity, NexiaThermostatEntity, NexiaThermostatZoneEntity
+from .executor import async_get_executor
+from .filters import SignificantChangeFilter
+from .schedules import schedule_names, zone_schedule_url
 from .util import percent_conv
 
+# Smallest change of a numeric sensor worth a new state, keyed by
+# sensor call. Changes below it are only written on the heartbeat.
+SIGNIFICANT_CHANGES = {
+    "get_current_compressor_speed": 5,
+    "get_requested_compressor_speed": 5,
+    "get_outdoor_temperature": 1,
+    "get_relative_humidity": 2,
+    "get_temperature": 0.5,
+}
+SENSOR_HEARTBEAT = 900
+
+
+def _significant_change_filter(sensor_call):
+    """Return the filter for a sensor call or None if it is not filtered."""
+    if sensor_call not in SIGNIFICANT_CHANGES:
+        return None
+    return SignificantChangeFilter(SIGNIFICANT_CHANGES[sensor_call], SENSOR_HEARTBEAT)
+
 
 async def async_setup_entry(hass, config_entry, async_add_entities):
     """Set up sensors for a Nexia device."""
 
-    nexia_data = hass.data[DOMAIN][config_entry.entry_id]
+    entry_data = hass.data[DOMAIN][config_entry.entry_id]
+    nexia_home = entry_data[NEXIA_DEVICE]
+    entities = [
+        NexiaAccountLoginSensor(entry_data[UPDATE_COORDINATOR], nexia_home),
+        NexiaExecutorSensor(
+            entry_data[UPDATE_COORDINATOR], nexia_home, async_get_executor(hass)
+        ),
+    ]
+    for nexia_data in entry_data[HOUSES].values():
+        entities.extend(_house_entities(nexia_data))
+    async_add_entities(entities, True)
+
+
+def _house_entities(nexia_data):
+    """Return the sensors of one house."""
     nexia_home = nexia_data[NEXIA_DEVICE]
-    coordinator = nexia_data[UPDATE_COORDINATOR]
-    entities = []
+    house_coordinator = nexia_data[UPDATE_COORDINATOR]
+    coordinators = nexia_data[THERMOSTAT_COORDINATORS]
+    schedule_cache = nexia_data[SCHEDULE_CACHE]
+    confirmations = nexia_data[COMMAND_CONFIRMATIONS]
+    entities = [
+        NexiaHousePayloadSensor(house_coordinator, nexia_home, nexia_data),
+        NexiaHouseCommandSensor(
+            house_coordinator,
+            nexia_home,
+            nexia_data[COMMAND_STATS],
+            nexia_data[SCHEDULER],
+        ),
+        NexiaHouseDataAgeSensor(
+            house_coordinator, nexia_home, list(coordinators.values())
+        ),
+    ]
+
+    # House aggregates
+    aggregates = nexia_data[HOUSE_AGGREGATES]
+    thermostats = nexia_home.thermostats or ()
+    if thermostats:
+        unit = (
+            TEMP_CELSIUS
+            if thermostats[0].get_unit() == UNIT_CELSIUS
+            else TEMP_FAHRENHEIT
+        )
+        for aggregate, name in (
+            ("average_temperature", "Average Temperature"),
+            ("minimum_temperature", "Minimum Temperature"),
+            ("maximum_temperature", "Maximum Temperature"),
+        ):
+            entities.append(
+                NexiaHouseAggregateSensor(
+                    house_coordinator,
+                    nexia_home,
+                    aggregates,
+                    aggregate,
+                    name,
+                    DEVICE_CLASS_TEMPERATURE,
+                    unit,
+                )
+            )
+    for aggregate, name in (
+        ("zones_calling", "Zones Calling"),
+        ("thermostats_heating", "Thermostats Heating"),
+        ("thermostats_cooling", "Thermostats Cooling"),
+    ):
+        entities.append(
+            NexiaHouseAggregateSensor(
+                house_coordinator, nexia_home, aggregates, aggregate, name, None, None
+            )
+        )
 
     # Thermostat / System Sensors
     for thermostat_id in nexia_home.get_thermostat_ids():
         thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
+        coordinator = coordinators[thermostat_id]
 
         entities.append(
             NexiaThermostatSensor(
@@ -36,6 +164,10 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                 None,
             )
         )
+        # Command apply latency
+        entities.append(
+            NexiaThermostatCommandLatencySensor(coordinator, thermostat, confirmations)
+        )
         # Air cleaner
         entities.append(
             NexiaThermostatSensor(
@@ -139,8 +271,13 @@ async def async_setup_entry(hass, config_entry, async_add_entities):
                     None,
                 )
             )
+            # Schedule
+            if zone_schedule_url(zone):
+                entities.append(
+                    NexiaZoneScheduleSensor(coordinator, zone, schedule_cache)
+                )
 
-    async_add_entities(entities, True)
+    return entities
 
 
 class NexiaThermostatSensor(NexiaThermostatEntity):
@@ -168,6 +305,7 @@ class NexiaThermostatSensor(NexiaThermostatEntity):
         self._state = None
         self._unit_of_measurement = sensor_unit
         self._modifier = modifier
+        self._filter = _significant_change_filter(sensor_call)
 
     @property
     def device_class(self):
@@ -177,6 +315,12 @@ class NexiaThermostatSensor(NexiaThermostatEntity):
     @property
     def state(self):
         """Return the state of the sensor."""
+        if self._filter:
+            return self._filter.value
+        return self._current_value()
+
+    def _current_value(self):
+        """Return the value the library has now."""
         val = getattr(self._thermostat, self._call)()
         if self._modifier:
             val = self._modifier(val)
@@ -184,12 +328,77 @@ class NexiaThermostatSensor(NexiaThermostatEntity):
             val = round(val, 1)
         return val
 
+    async def async_added_to_hass(self):
+        """Publish the current value and subscribe to updates."""
+        if self._filter:
+            self._filter.accept(self._current_value())
+        await super().async_added_to_hass()
+
+    @callback
+    def _async_handle_coordinator_update(self):
+        """Write the state only when it changed significantly."""
+        if self._filter:
+            if not self.available:
+                self._filter.reset()
+            elif not self._filter.accept(self._current_value()):
+                return
+        self.async_write_ha_state()
+
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement this sensor expresses itself in."""
         return self._unit_of_measurement
 
 
+class NexiaThermostatCommandLatencySensor(NexiaThermostatEntity):
+    """Time from sending a command to a poll showing the thermostat applied it."""
+
+    def __init__(self, coordinator, thermostat, confirmations):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            thermostat,
+            name=f"{thermostat.get_name()} Command Latency",
+            unique_id=f"{thermostat.thermostat_id}_command_latency",
+        )
+        self._confirmations = confirmations
+        self._stats = confirmations.stats[thermostat.thermostat_id]
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:timer-sand"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        if self._stats.last_latency is None:
+            return None
+        return round(self._stats.last_latency, 1)
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement this sensor expresses itself in."""
+        return TIME_SECONDS
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes."""
+        data = super().device_state_attributes
+        stats = self._stats
+        if stats.confirmed:
+            data[ATTR_AVERAGE_LATENCY] = round(stats.average_latency, 1)
+            data[ATTR_MAX_LATENCY] = round(stats.max_latency, 1)
+        data[ATTR_CONFIRMED_COMMANDS] = stats.confirmed
+        data[ATTR_UNCONFIRMED_COMMANDS] = stats.unconfirmed
+        data[ATTR_PENDING_COMMANDS] = self._confirmations.pending_count(
+            self._thermostat.thermostat_id
+        )
+        if stats.failure_rate is not None:
+            data[ATTR_FAILURE_RATE] = round(stats.failure_rate, 1)
+        return data
+
+
 class NexiaThermostatZoneSensor(NexiaThermostatZoneEntity):
     """Nexia Zone Sensor Support."""
 
@@ -216,6 +425,7 @@ class NexiaThermostatZoneSensor(NexiaThermostatZoneEntity):
         self._state = None
         self._unit_of_measurement = sensor_unit
         self._modifier = modifier
+        self._filter = _significant_change_filter(sensor_call)
 
     @property
     def device_class(self):
@@ -225,6 +435,12 @@ class NexiaThermostatZoneSensor(NexiaThermostatZoneEntity):
     @property
     def state(self):
         """Return the state of the sensor."""
+        if self._filter:
+            return self._filter.value
+        return self._current_value()
+
+    def _current_value(self):
+        """Return the value the library has now."""
         val = getattr(self._zone, self._call)()
         if self._modifier:
             val = self._modifier(val)
@@ -232,7 +448,332 @@ class NexiaThermostatZoneSensor(NexiaThermostatZoneEntity):
             val = round(val, 1)
         return val
 
+    async def async_added_to_hass(self):
+        """Publish the current value and subscribe to updates."""
+        if self._filter:
+            self._filter.accept(self._current_value())
+        await super().async_added_to_hass()
+
+    @callback
+    def _async_handle_coordinator_update(self):
+        """Write the state only when it changed significantly."""
+        if self._filter:
+            if not self.available:
+                self._filter.reset()
+            elif not self._filter.accept(self._current_value()):
+                return
+        self.async_write_ha_state()
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement this sensor expresses itself in."""
+        return self._unit_of_measurement
+
+
+class NexiaHousePayloadSensor(NexiaHouseEntity):
+    """Size of the house JSON retained between refreshes."""
+
+    def __init__(self, coordinator, nexia_home, nexia_data):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} House Data",
+            unique_id=f"{nexia_home.house_id}_house_data",
+        )
+        self._nexia_data = nexia_data
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:memory"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return round(self._nexia_data[PAYLOAD_SIZE] / 1024, 1)
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement this sensor expresses itself in."""
+        return DATA_KIBIBYTES
+
+
+class NexiaHouseCommandSensor(NexiaHouseEntity):
+    """Commands sent to the cloud and commands skipped as no-ops."""
+
+    def __init__(self, coordinator, nexia_home, command_stats, scheduler):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} Commands Sent",
+            unique_id=f"{nexia_home.house_id}_commands_sent",
+        )
+        self._command_stats = command_stats
+        self._scheduler = scheduler
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:send"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._command_stats.total_executed
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes."""
+        data = super().device_state_attributes
+        data[ATTR_SKIPPED_COMMANDS] = self._command_stats.total_skipped
+        data[ATTR_SKIPPED_POLLS] = self._scheduler.skipped_polls
+        data[ATTR_DISCARDED_POLLS] = self._scheduler.discarded_polls
+        return data
+
+
+class NexiaAccountLoginSensor(NexiaHouseEntity):
+    """Logins of the account, attached to the house it logs in with."""
+
+    def __init__(self, coordinator, nexia_home):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} Logins",
+            unique_id=f"{nexia_home.house_id}_logins",
+        )
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:account-key"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._nexia_home.total_logins
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes."""
+        data = super().device_state_attributes
+        data[ATTR_EXPIRED_LOGINS] = self._nexia_home.logins[LOGIN_EXPIRED]
+        data[ATTR_REFRESHED_LOGINS] = self._nexia_home.logins[LOGIN_REFRESH]
+        if self._nexia_home.last_login_seconds is not None:
+            data[ATTR_LAST_LOGIN_DURATION] = round(
+                self._nexia_home.last_login_seconds, 3
+            )
+        data[ATTR_TOTAL_LOGIN_DURATION] = round(self._nexia_home.login_seconds, 3)
+        if self._nexia_home.session_lifetime is not None:
+            data[ATTR_SESSION_LIFETIME] = round(self._nexia_home.session_lifetime)
+        return data
+
+
+class NexiaExecutorSensor(NexiaHouseEntity):
+    """Deepest queue of the Nexia worker pool and how busy it is."""
+
+    def __init__(self, coordinator, nexia_home, executor):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} I/O Queue Peak",
+            unique_id=f"{nexia_home.house_id}_io_queue_peak",
+        )
+        self._executor = executor
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:tray-full"
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return self._executor.max_queue_depth
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes."""
+        data = super().device_state_attributes
+        data[ATTR_QUEUE_DEPTH] = self._executor.queue_depth
+        data[ATTR_ACTIVE_WORKERS] = self._executor.active
+        data[ATTR_WORKERS] = self._executor.max_workers
+        data[ATTR_SATURATED_JOBS] = self._executor.saturated
+        data[ATTR_COMPLETED_JOBS] = self._executor.completed
+        data[ATTR_MAX_WAIT] = round(self._executor.max_wait, 3)
+        return data
+
+
+class NexiaHouseDataAgeSensor(NexiaHouseEntity):
+    """Age of the oldest data served for the house."""
+
+    def __init__(self, coordinator, nexia_home, thermostat_coordinators):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} Data Age",
+            unique_id=f"{nexia_home.house_id}_data_age",
+        )
+        self._thermostat_coordinators = thermostat_coordinators
+
+    @property
+    def available(self):
+        """Return True, the age is known even when the cloud is not."""
+        return True
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:clock-alert-outline"
+
+    @property
+    def unit_of_measurement(self):
+        """Return the unit of measurement of this entity."""
+        return TIME_SECONDS
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return round(
+            max(
+                coordinator.data_age.total_seconds()
+                for coordinator in (self._coordinator, *self._thermostat_coordinators)
+            )
+        )
+
+    @property
+    def device_state_attributes(self):
+        """Return the device specific state attributes."""
+        data = super().device_state_attributes
+        data[ATTR_STALE_BUDGET] = self._coordinator.stale_budget.total_seconds()
+        return data
+
+    async def async_added_to_hass(self):
+        """Subscribe to updates of every coordinator of the house."""
+        await super().async_added_to_hass()
+        for coordinator in self._thermostat_coordinators:
+            coordinator.async_add_listener(self.async_write_ha_state)
+
+    async def async_will_remove_from_hass(self):
+        """Undo subscription."""
+        await super().async_will_remove_from_hass()
+        for coordinator in self._thermostat_coordinators:
+            coordinator.async_remove_listener(self.async_write_ha_state)
+
+
+class NexiaZoneScheduleSensor(NexiaThermostatZoneEntity):
+    """The locally cached schedule of a zone."""
+
+    def __init__(self, coordinator, zone, schedule_cache):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            zone,
+            name=f"{zone.get_name()} Schedule",
+            unique_id=f"{zone.zone_id}_schedule",
+        )
+        self._schedule_cache = schedule_cache
+        self._schedule_update_subscription = None
+
+    @property
+    def device_class(self):
+        """Return the device class of the sensor."""
+        return DEVICE_CLASS_TIMESTAMP
+
+    @property
+    def icon(self):
+        """Return the icon of the sensor."""
+        return "mdi:calendar-clock"
+
+    @property
+    def state(self):
+        """Return when the schedule last changed."""
+        changed_at = self._schedule_cache.get_changed_at(self._zone.zone_id)
+        return changed_at and changed_at.isoformat()
+
+    @property
+    def device_state_attributes(self):
+        """Return a summary of the schedule.
+
+        The full schedule stays in storage so the recorder does not
+        write it with every state.
+        """
+        data = super().device_state_attributes
+        names = schedule_names(self._schedule_cache.get_schedule(self._zone.zone_id))
+        data[ATTR_SCHEDULE_COUNT] = len(names)
+        data[ATTR_SCHEDULE_NAMES] = names
+        return data
+
+    async def async_added_to_hass(self):
+        """Listen for schedule changes."""
+        await super().async_added_to_hass()
+        self._schedule_update_subscription = async_dispatcher_connect(
+            self.hass,
+            f"{SIGNAL_SCHEDULE_UPDATE}-{self._zone.zone_id}",
+            self.async_write_ha_state,
+        )
+
+    async def async_will_remove_from_hass(self):
+        """Unsub from schedule changes."""
+        await super().async_will_remove_from_hass()
+        if self._schedule_update_subscription:
+            self._schedule_update_subscription()
+
+
+class NexiaHouseAggregateSensor(NexiaHouseEntity):
+    """A house-wide aggregate of the zones and thermostats."""
+
+    def __init__(
+        self,
+        coordinator,
+        nexia_home,
+        aggregates,
+        aggregate,
+        sensor_name,
+        sensor_class,
+        sensor_unit,
+    ):
+        """Initialize the sensor."""
+        super().__init__(
+            coordinator,
+            nexia_home,
+            name=f"{nexia_home.get_name()} {sensor_name}",
+            unique_id=f"{nexia_home.house_id}_{aggregate}",
+        )
+        self._aggregates = aggregates
+        self._aggregate = aggregate
+        self._class = sensor_class
+        self._unit_of_measurement = sensor_unit
+        self._aggregate_update_subscription = None
+
+    @property
+    def device_class(self):
+        """Return the device class of the sensor."""
+        return self._class
+
+    @property
+    def state(self):
+        """Return the state of the sensor."""
+        return getattr(self._aggregates, self._aggregate)
+
     @property
     def unit_of_measurement(self):
         """Return the unit of measurement this sensor expresses itself in."""
         return self._unit_of_measurement
+
+    async def async_added_to_hass(self):
+        """Listen for aggregate changes."""
+        await super().async_added_to_hass()
+        self._aggregate_update_subscription = async_dispatcher_connect(
+            self.hass, self._aggregates.signal, self.async_write_ha_state
+        )
+
+    async def async_will_remove_from_hass(self):
+        """Unsub from aggregate changes."""
+        await super().async_will_remove_from_hass()
+        if self._aggregate_update_subscription:
+            self._aggregate_update_subscription()
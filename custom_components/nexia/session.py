@@ -0,0 +1,207 @@
+"""Authenticated session cache for Nexia accounts."""
+import logging
+import uuid
+
+from nexia.home import NexiaHome
+from requests.exceptions import HTTPError
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.storage import Store
+from homeassistant.util.json import load_json, save_json
+
+from .auth import NexiaAuthHome
+from .const import DOMAIN, NEXIA_SESSIONS
+from .executor import async_get_executor
+from .transport import attach_transport
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_KEY = f"{DOMAIN}.sessions"
+STORAGE_VERSION = 1
+
+TOKEN_API_KEY = "api_key"
+TOKEN_HOUSE_ID = "house_id"
+TOKEN_HOUSE_IDS = "house_ids"
+TOKEN_LOGGED_IN_AT = "logged_in_at"
+TOKEN_MOBILE_ID = "mobile_id"
+TOKEN_SESSION_LIFETIME = "session_lifetime"
+
+STATE_FILE_UUID = "nexia_uuid"
+
+
+async def async_get_session_cache(hass: HomeAssistant):
+    """Return the session cache, loading the persisted tokens on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    cache = domain_data.get(NEXIA_SESSIONS)
+    if cache is None:
+        cache = domain_data[NEXIA_SESSIONS] = NexiaSessionCache(hass)
+    await cache.async_load()
+    return cache
+
+
+async def async_ensure_state_file(hass: HomeAssistant, state_file):
+    """Make sure the state file holds a device uuid before logging in.
+
+    The library only reads the file when it is valid, so this keeps
+    its blocking, non-atomic write out of the login path.
+    """
+    await async_get_executor(hass).async_add_executor_job(
+        _ensure_state_file, state_file
+    )
+
+
+def _ensure_state_file(state_file):
+    """Write a new device uuid to the state file if it lacks a valid one."""
+    try:
+        data = load_json(state_file)
+    except HomeAssistantError:
+        data = {}
+    if not isinstance(data, dict):
+        data = {}
+
+    try:
+        uuid.UUID(data[STATE_FILE_UUID], version=4)
+        return
+    except (KeyError, TypeError, ValueError, AttributeError):
+        pass
+
+    data[STATE_FILE_UUID] = str(uuid.uuid4())
+    _LOGGER.debug("Writing new device uuid to %s", state_file)
+    save_json(state_file, data)
+
+
+class NexiaSessionCache:
+    """Authenticated NexiaHome objects keyed by username.
+
+    The config flow leaves the NexiaHome it logged in with here so
+    entry setup can pick it up instead of logging in again. The
+    tokens are persisted so restarts and reloads only log in when
+    the cloud rejects them.
+    """
+
+    def __init__(self, hass: HomeAssistant):
+        """Initialize the cache."""
+        self._hass = hass
+        self._store = Store(hass, STORAGE_VERSION, STORAGE_KEY, private=True)
+        self._sessions = {}
+        self._tokens = None
+
+    async def async_load(self):
+        """Load the persisted tokens."""
+        if self._tokens is not None:
+            return
+        tokens = await self._store.async_load()
+        if self._tokens is None:
+            self._tokens = tokens or {}
+
+    async def async_add(self, nexia_home: NexiaHome):
+        """Cache a NexiaHome that has already logged in."""
+        self._sessions[nexia_home.username] = nexia_home
+        await self.async_save_tokens(nexia_home)
+
+    async def async_get_nexia_home(self, username, password, device_name, state_file):
+        """Return a logged in and updated NexiaHome for the account.
+
+        A cached session is reused as long as the password has not
+        changed. Otherwise the persisted tokens are tried before
+        falling back to a full login.
+        """
+        nexia_home = self._sessions.pop(username, None)
+        if nexia_home is None or nexia_home.password != password:
+            nexia_home = NexiaAuthHome(
+                username=username,
+                password=password,
+                auto_login=False,
+                auto_update=False,
+                device_name=device_name,
+                state_file=state_file,
+            )
+            attach_transport(self._hass, nexia_home)
+            self._restore_tokens(nexia_home)
+
+        if nexia_home.thermostats is None:
+            await async_ensure_state_file(self._hass, state_file)
+            await async_get_executor(self._hass).async_add_executor_job(
+                _login_and_update, nexia_home
+            )
+
+        self._sessions[username] = nexia_home
+        await self.async_save_tokens(nexia_home)
+        return nexia_home
+
+    async def async_save_tokens(self, nexia_home: NexiaHome):
+        """Persist the tokens of a session if they have changed.
+
+        The other houses of an account share the tokens of the
+        cached session and are not saved.
+        """
+        if self._sessions.get(nexia_home.username) is not nexia_home:
+            return
+        if not nexia_home.mobile_id or not nexia_home.house_id:
+            return
+        tokens = {
+            TOKEN_API_KEY: nexia_home.api_key,
+            TOKEN_HOUSE_ID: nexia_home.house_id,
+            TOKEN_HOUSE_IDS: self.get_house_ids(nexia_home.username),
+            TOKEN_LOGGED_IN_AT: nexia_home.logged_in_at,
+            TOKEN_MOBILE_ID: nexia_home.mobile_id,
+            TOKEN_SESSION_LIFETIME: nexia_home.session_lifetime,
+        }
+        if self._tokens.get(nexia_home.username) == tokens:
+            return
+        self._tokens[nexia_home.username] = tokens
+        await self._store.async_save(self._tokens)
+
+    def get_house_ids(self, username):
+        """Return the ids of the houses last found for an account or None."""
+        return self._tokens.get(username, {}).get(TOKEN_HOUSE_IDS)
+
+    async def async_set_house_ids(self, username, house_ids):
+        """Remember the houses of an account that has saved tokens."""
+        tokens = self._tokens.get(username)
+        if tokens is None or tokens.get(TOKEN_HOUSE_IDS) == house_ids:
+            return
+        tokens[TOKEN_HOUSE_IDS] = list(house_ids)
+        await self._store.async_save(self._tokens)
+
+    async def async_remove(self, username):
+        """Forget the session and tokens for an account."""
+        self._sessions.pop(username, None)
+        if self._tokens.pop(username, None) is not None:
+            await self._store.async_save(self._tokens)
+
+    def _restore_tokens(self, nexia_home: NexiaHome):
+        """Restore persisted tokens so the login can be skipped."""
+        tokens = self._tokens.get(nexia_home.username)
+        if not tokens:
+            return
+        nexia_home.api_key = tokens[TOKEN_API_KEY]
+        nexia_home.house_id = tokens[TOKEN_HOUSE_ID]
+        nexia_home.mobile_id = tokens[TOKEN_MOBILE_ID]
+        nexia_home.logged_in_at = tokens.get(TOKEN_LOGGED_IN_AT)
+        nexia_home.login_restored = True
+        nexia_home.session_lifetime = tokens.get(TOKEN_SESSION_LIFETIME)
+
+
+def _login_and_update(nexia_home: NexiaHome):
+    """Login if needed and fetch the house.
+
+    The library logs in again by itself when the cloud redirects
+    an expired session to the login page.
+    """
+    if not nexia_home.mobile_id:
+        nexia_home.login()
+        nexia_home.update()
+        return
+
+    try:
+        nexia_home.update()
+    except HTTPError as http_ex:
+        if http_ex.response.status_code < 400 or http_ex.response.status_code >= 500:
+            raise
+        _LOGGER.debug(
+            "Stored session for %s was rejected, logging in again", nexia_home.username,
+        )
+        nexia_home.login()
+        nexia_home.update()
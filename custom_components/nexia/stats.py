@@ -0,0 +1,28 @@
+"""Command statistics for Nexia / Trane XL thermostats."""
+from collections import Counter
+
+
+class NexiaCommandStats:
+    """Count the commands that were sent and the ones skipped as no-ops."""
+
+    def __init__(self):
+        """Initialize the counters."""
+        self.executed = Counter()
+        self.skipped = Counter()
+
+    def record(self, command, skipped):
+        """Count one command."""
+        if skipped:
+            self.skipped[command] += 1
+        else:
+            self.executed[command] += 1
+
+    @property
+    def total_executed(self):
+        """Return the number of commands sent to the cloud."""
+        return sum(self.executed.values())
+
+    @property
+    def total_skipped(self):
+        """Return the number of commands skipped because nothing would change."""
+        return sum(self.skipped.values())
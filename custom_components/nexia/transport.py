@@ -0,0 +1,448 @@
+"""Record and replay transports for the Nexia cloud API."""
+from collections import defaultdict
+import copy
+import gzip
+import json
+import logging
+import re
+import threading
+import time
+
+from nexia.const import MOBILE_URL
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from .const import DATA_TRANSPORT, DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+REDACTED = "**REDACTED**"
+# Values that authenticate the account, in requests and responses
+REDACT_KEYS = ("password", "api_key", "mobile_id")
+REDACT_HEADERS = ("authorization", "cookie", "set-cookie", "x-apikey", "x-mobileid")
+# Stand ins for the redacted tokens of a replayed login
+REPLAY_TOKENS = {"api_key": "replay", "mobile_id": 1}
+
+KEY_BODY = "body"
+KEY_DATA = "data"
+KEY_ELAPSED = "elapsed"
+KEY_HEADERS = "headers"
+KEY_METHOD = "method"
+KEY_OFFSET = "offset"
+KEY_STATUS = "status"
+KEY_URL = "url"
+# Marks a recorded house payload, which is scaled as it is replayed
+KEY_HOUSE = "house"
+
+SESSION_URL = MOBILE_URL + "/session"
+# Copies of a scaled up house or thermostat get ids offset by
+# multiples of this
+SCALE_ID_OFFSET = 10 ** 8
+# A number standing on its own in a url, like the id in
+# /xxl_zones/83261002 or device_identifier=XxlZone-83261002
+URL_ID_RE = re.compile(r"(?<!\w)(\d+)(?!\w)")
+
+
+def attach_transport(hass, nexia_home):
+    """Swap the requests session of a NexiaHome for the configured transport."""
+    transport = hass.data.get(DOMAIN, {}).get(DATA_TRANSPORT)
+    if transport is None:
+        return
+    session = transport.create_session()
+    session.max_redirects = nexia_home.session.max_redirects
+    nexia_home.session = session
+
+
+class NexiaRecorder:
+    """Append every request and response to a gzipped JSON lines log.
+
+    Passwords and session tokens are redacted before they are written.
+    """
+
+    def __init__(self, path):
+        """Initialize the recorder."""
+        self._path = path
+        self._lock = threading.Lock()
+        self._start = time.monotonic()
+        self._fptr = None
+        self._closed = False
+
+    def create_session(self):
+        """Return a session that records into this log."""
+        return RecordingSession(self)
+
+    def record(self, method, url, data, response, elapsed):
+        """Write one exchange to the log.
+
+        This does blocking I/O and is called from the executor.
+        """
+        entry = {
+            KEY_OFFSET: round(time.monotonic() - self._start - elapsed, 3),
+            KEY_ELAPSED: round(elapsed, 3),
+            KEY_METHOD: method,
+            KEY_URL: url,
+            KEY_DATA: _redact(data),
+            KEY_STATUS: response.status_code,
+            KEY_HEADERS: {
+                key: REDACTED if key.lower() in REDACT_HEADERS else value
+                for key, value in response.headers.items()
+            },
+            KEY_BODY: _redact_body(response.text),
+        }
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._closed:
+                return
+            if self._fptr is None:
+                self._fptr = gzip.open(self._path, "at", encoding="utf-8")
+            self._fptr.write(line)
+
+    def close(self):
+        """Finish the log, dropping anything recorded later.
+
+        This does blocking I/O and should be run in the executor.
+        """
+        with self._lock:
+            self._closed = True
+            if self._fptr is not None:
+                self._fptr.close()
+                self._fptr = None
+
+
+class RecordingSession(requests.Session):
+    """A requests session that records everything it sends and receives."""
+
+    def __init__(self, recorder):
+        """Initialize the session."""
+        super().__init__()
+        self._recorder = recorder
+
+    def request(self, method, url, *args, **kwargs):
+        """Send the request and record the exchange."""
+        start = time.monotonic()
+        response = super().request(method, url, *args, **kwargs)
+        self._recorder.record(
+            method.upper(), url, kwargs.get("data"), response, time.monotonic() - start
+        )
+        return response
+
+
+class NexiaReplay:
+    """Serve responses from a log written by NexiaRecorder."""
+
+    def __init__(self, path, speed, scale=1, houses=1):
+        """Load the log.
+
+        This does blocking I/O and should be run in the executor.
+
+        A speed of 2 replays each request in half the recorded time,
+        a speed of 0 replays without any delay.
+
+        A scale above 1 multiplies the thermostats in every recorded
+        house and houses above 1 multiplies the houses of the account,
+        so large installs can be simulated from a small one.
+        """
+        self._speed = speed
+        self._scale = scale
+        self._houses = houses
+        self._lock = threading.Lock()
+        self._exchanges = defaultdict(list)
+        self._positions = {}
+        with gzip.open(path, "rt", encoding="utf-8") as fptr:
+            entries = [json.loads(line) for line in fptr]
+        self._device_ids = set()
+        self._house_ids = set()
+        if scale > 1 or houses > 1:
+            for entry in entries:
+                if entry[KEY_METHOD] == "GET":
+                    self._device_ids |= _house_device_ids(entry[KEY_BODY])
+                elif entry[KEY_URL] == SESSION_URL:
+                    self._house_ids |= _session_house_ids(entry[KEY_BODY])
+        for entry in entries:
+            entry[KEY_BODY] = _replay_tokens(entry[KEY_BODY])
+            if self._device_ids and entry[KEY_METHOD] == "GET":
+                entry[KEY_HOUSE] = bool(_house_device_ids(entry[KEY_BODY]))
+            elif houses > 1 and entry[KEY_URL] == SESSION_URL:
+                entry[KEY_BODY] = _scale_session_body(
+                    entry[KEY_BODY], houses, self._house_ids
+                )
+            self._exchanges[(entry[KEY_METHOD], entry[KEY_URL])].append(entry)
+        _LOGGER.debug(
+            "Loaded %s recorded exchanges from %s",
+            sum(len(exchanges) for exchanges in self._exchanges.values()),
+            path,
+        )
+
+    def create_session(self):
+        """Return a session that replays from this log."""
+        return ReplaySession(self)
+
+    def next_exchange(self, method, url):
+        """Return the next recorded exchange for the request.
+
+        Every copy of a house or thermostat works through the recorded
+        exchanges on its own. Once they run out the last one is
+        repeated so polling can continue past the recording.
+        """
+        device_copy = house_copy = None
+        if self._device_ids or self._house_ids:
+            device_copy, house_copy, url = _unscale_url(
+                url, self._device_ids, self._house_ids
+            )
+            if device_copy is not None:
+                house_copy = device_copy // self._scale
+        key = (method, url)
+        exchanges = self._exchanges.get(key)
+        if not exchanges:
+            raise requests.exceptions.ConnectionError(
+                f"No recorded response for {method} {url}"
+            )
+        with self._lock:
+            position = self._positions.get((device_copy, house_copy, key), 0)
+            self._positions[(device_copy, house_copy, key)] = position + 1
+        entry = exchanges[min(position, len(exchanges) - 1)]
+        if self._speed:
+            time.sleep(entry[KEY_ELAPSED] / self._speed)
+        if entry.get(KEY_HOUSE):
+            entry = dict(entry)
+            entry[KEY_BODY] = _scale_house_body(
+                entry[KEY_BODY],
+                self._scale,
+                self._device_ids,
+                self._house_ids,
+                house_copy or 0,
+            )
+        elif device_copy or house_copy:
+            entry = dict(entry)
+            entry[KEY_BODY] = _offset_body(
+                entry[KEY_BODY],
+                _copy_indexes(
+                    self._device_ids, self._house_ids, device_copy or 0, house_copy
+                ),
+            )
+        return entry
+
+
+class ReplaySession(requests.Session):
+    """A requests session that never touches the network."""
+
+    def __init__(self, replay):
+        """Initialize the session."""
+        super().__init__()
+        self._replay = replay
+
+    def request(self, method, url, *args, **kwargs):
+        """Return the recorded response for the request."""
+        entry = self._replay.next_exchange(method.upper(), url)
+        response = requests.Response()
+        response.status_code = entry[KEY_STATUS]
+        response.headers = CaseInsensitiveDict(entry[KEY_HEADERS])
+        response.url = url
+        response.reason = ""
+        response.encoding = "utf-8"
+        # pylint: disable=protected-access
+        response._content = entry[KEY_BODY].encode("utf-8")
+        return response
+
+
+def _redact(value):
+    """Return a request or response payload with its secrets redacted."""
+    if isinstance(value, dict):
+        return {
+            key: REDACTED if key in REDACT_KEYS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _redact_body(body):
+    """Return a response body with its secrets redacted."""
+    if not any(key in body for key in REDACT_KEYS):
+        return body
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(_redact(payload), separators=(",", ":"))
+
+
+def _replay_tokens(body):
+    """Put stand ins for the tokens redacted from a recorded response."""
+    if REDACTED not in body:
+        return body
+    try:
+        payload = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(_unredact(payload), separators=(",", ":"))
+
+
+def _unredact(value):
+    """Return a payload with stand ins for its redacted tokens."""
+    if isinstance(value, dict):
+        return {
+            key: REPLAY_TOKENS[key]
+            if item == REDACTED and key in REPLAY_TOKENS
+            else _unredact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_unredact(item) for item in value]
+    return value
+
+
+def _unscale_url(url, device_ids, house_ids):
+    """Map a url of a scaled copy back to the recorded house or device.
+
+    Returns the copy index of the device and of the house in the url,
+    None where it has none and 0 for a recorded one, and the url.
+    """
+    copies = {}
+
+    def _unscale_id(match):
+        copy_index, recorded_id = divmod(int(match.group(1)), SCALE_ID_OFFSET)
+        if recorded_id in device_ids:
+            copies.setdefault("device", copy_index)
+        elif recorded_id in house_ids:
+            copies.setdefault("house", copy_index)
+        else:
+            return match.group(1)
+        return str(recorded_id)
+
+    url = URL_ID_RE.sub(_unscale_id, url)
+    return copies.get("device"), copies.get("house"), url
+
+
+def _house_devices(house):
+    """Return the thermostats of a house payload or None."""
+    try:
+        return house["result"]["_links"]["child"][0]["data"]["items"]
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def _house_device_ids(body):
+    """Return the ids of the thermostats and zones in a house body."""
+    try:
+        devices = _house_devices(json.loads(body))
+    except ValueError:
+        return set()
+    device_ids = set()
+    for device in devices or ():
+        device_ids.add(device["id"])
+        device_ids.update(zone["id"] for zone in device.get("zones", ()))
+    return device_ids
+
+
+def _session_houses(session):
+    """Return the houses listed in a session payload or None."""
+    try:
+        return session["result"]["_links"]["child"]
+    except (KeyError, TypeError):
+        return None
+
+
+def _session_house_ids(body):
+    """Return the ids of the houses listed in a session body."""
+    try:
+        houses = _session_houses(json.loads(body))
+    except ValueError:
+        return set()
+    return {house.get("data", {}).get("id") for house in houses or ()} - {None}
+
+
+def _copy_indexes(device_ids, house_ids, device_copy, house_copy):
+    """Return the copy index of every recorded id a scaled copy offsets."""
+    copy_indexes = {}
+    if device_copy:
+        copy_indexes.update(dict.fromkeys(device_ids, device_copy))
+    if house_copy:
+        copy_indexes.update(dict.fromkeys(house_ids, house_copy))
+    return copy_indexes
+
+
+def _scale_session_body(body, houses, house_ids):
+    """Multiply the houses listed in a recorded session payload."""
+    try:
+        session = json.loads(body)
+    except ValueError:
+        return body
+    children = _session_houses(session)
+    if not children:
+        return body
+    children[:] = [
+        _offset_ids(copy.deepcopy(child), _copy_indexes((), house_ids, 0, house_copy))
+        for house_copy in range(houses)
+        for child in children
+    ]
+    return json.dumps(session, separators=(",", ":"))
+
+
+def _scale_house_body(body, scale, device_ids, house_ids, house_copy):
+    """Return a copy of a recorded house payload with its thermostats multiplied.
+
+    The thermostats of house copy n are device copies n * scale up to
+    (n + 1) * scale, so every house copy has ids of its own.
+    """
+    try:
+        house = json.loads(body)
+    except ValueError:
+        return body
+    devices = _house_devices(house)
+    if not devices:
+        return body
+    first_copy = house_copy * scale
+    devices[:] = [
+        _offset_ids(
+            copy.deepcopy(device),
+            _copy_indexes(device_ids, house_ids, device_copy, house_copy),
+        )
+        for device_copy in range(first_copy, first_copy + scale)
+        for device in devices
+    ]
+    house = _offset_ids(house, _copy_indexes((), house_ids, 0, house_copy))
+    return json.dumps(house, separators=(",", ":"))
+
+
+def _offset_body(body, copy_indexes):
+    """Offset the ids in a recorded response for a scaled copy."""
+    try:
+        response = json.loads(body)
+    except ValueError:
+        return body
+    return json.dumps(_offset_ids(response, copy_indexes), separators=(",", ":"))
+
+
+def _offset_ids(value, copy_indexes):
+    """Give the houses and devices in a recorded payload the ids of a copy.
+
+    copy_indexes maps each recorded id to the index of its copy. The
+    ids are offset wherever they appear, including the urls the copy
+    is polled, commanded and scheduled at, so a copy never reaches
+    the recorded house or device.
+    """
+    if not copy_indexes:
+        return value
+    if isinstance(value, dict):
+        copy_index = copy_indexes.get(value.get("id"))
+        for key, item in value.items():
+            if copy_index and key == "id":
+                value[key] = item + copy_index * SCALE_ID_OFFSET
+            elif copy_index and key == "name" and isinstance(item, str):
+                value[key] = f"{item} {copy_index}"
+            else:
+                value[key] = _offset_ids(item, copy_indexes)
+        return value
+    if isinstance(value, list):
+        return [_offset_ids(item, copy_indexes) for item in value]
+    if isinstance(value, str) and value.startswith("http"):
+        return URL_ID_RE.sub(
+            lambda match: str(
+                int(match.group(1))
+                + copy_indexes.get(int(match.group(1)), 0) * SCALE_ID_OFFSET
+            ),
+            value,
+        )
+    return value
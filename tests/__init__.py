@@ -0,0 +1 @@
+"""Tests for the nexia integration."""
@@ -0,0 +1,271 @@
+"""Helpers for the nexia tests."""
+import copy
+from datetime import timedelta
+import json
+import os
+import threading
+import time
+from urllib.parse import parse_qsl, urlparse
+
+from nexia.home import NexiaHome
+import requests
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+import homeassistant.util.dt as dt_util
+
+from custom_components.nexia.const import DATA_TRANSPORT, DOMAIN
+from custom_components.nexia.coordinator import fetch_thermostat
+from custom_components.nexia.transport import NexiaRecorder
+
+HOUSE_ID = 123456
+USERNAME = "user@example.com"
+PASSWORD = "password-secret"
+API_KEY = "api-key-secret"
+MOBILE_ID = 987654321
+SESSION_COOKIE = "_mynexia_session=cookie-secret"
+
+# What return_to_schedule puts a zone back to
+SCHEDULE_SETPOINTS = {"heat": 62, "cool": 80}
+SCHEDULE_PRESET = 1
+# The schedules every zone has
+SCHEDULE_NAMES = ["Weekdays", "Weekends"]
+# How often the fixture thermostats report to the cloud
+REPORT_INTERVAL = timedelta(minutes=2)
+
+
+def load_fixture(filename):
+    """Return the parsed json of a fixture."""
+    path = os.path.join(os.path.dirname(__file__), "fixtures", filename)
+    with open(path, encoding="utf-8") as fptr:
+        return json.load(fptr)
+
+
+def record_house(cloud, path, polls=1):
+    """Record a login, the house, polls of every thermostat and two commands.
+
+    Every poll after the first finds new readings.
+    """
+    recorder = NexiaRecorder(str(path))
+    nexia_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(path) + ".conf",
+    )
+    nexia_home.session = recorder.create_session()
+    nexia_home.session.mount("https://", cloud)
+    nexia_home.login()
+    nexia_home.update()
+    for poll in range(polls):
+        if poll:
+            cloud.report(1 if poll % 2 else -1)
+        for thermostat_id in nexia_home.get_thermostat_ids():
+            thermostat = nexia_home.get_thermostat_by_id(thermostat_id)
+            fetch_thermostat(nexia_home, thermostat)
+    zone = first_zone(nexia_home)
+    zone.set_heat_cool_temp(70, 78)
+    zone.thermostat.set_fan_mode("On")
+    recorder.close()
+
+
+def first_zone(nexia_home):
+    """Return the first zone of the first thermostat."""
+    thermostat = nexia_home.get_thermostat_by_id(nexia_home.get_thermostat_ids()[0])
+    return thermostat.get_zone_by_id(thermostat.get_zone_ids()[0])
+
+
+async def async_setup_nexia(hass, transport):
+    """Set up the nexia integration against a transport and return its entry."""
+    hass.data.setdefault(DOMAIN, {})[DATA_TRANSPORT] = transport
+    await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": "user"},
+        data={CONF_USERNAME: USERNAME, CONF_PASSWORD: PASSWORD},
+    )
+    await hass.async_block_till_done()
+    return hass.config_entries.async_entries(DOMAIN)[0]
+
+
+class FakeNexiaCloud(BaseAdapter):
+    """A mynexia.com that serves a house and applies zone commands.
+
+    It is a transport for the integration and can be mounted on any
+    requests session, so nothing touches the network. Zone posts are
+    applied one at a time and answered with the zone as it is then,
+    like the cloud does.
+    """
+
+    def __init__(self, house=None):
+        """Initialize the cloud."""
+        super().__init__()
+        self.house = house or load_fixture("mobile_houses_123456.json")
+        self.requests = []
+        self.closed = False
+        # Seconds a zone post to an end point, or a fetch of an
+        # xxl_thermostats url, takes before it is answered
+        self.delays = {}
+        # End points whose zone posts are answered but never applied
+        self.ignored = set()
+        self._lock = threading.Lock()
+
+    def create_session(self):
+        """Return a session served by this cloud."""
+        session = requests.Session()
+        session.mount("https://", self)
+        return session
+
+    @property
+    def thermostats(self):
+        """Return the thermostat json of the house."""
+        return self.house["result"]["_links"]["child"][0]["data"]["items"]
+
+    def thermostat_json(self, thermostat_id):
+        """Return the json of a thermostat."""
+        for thermostat in self.thermostats:
+            if thermostat["id"] == thermostat_id:
+                return thermostat
+        raise KeyError(thermostat_id)
+
+    def zone_json(self, zone_id):
+        """Return the json of a zone."""
+        for thermostat in self.thermostats:
+            for zone in thermostat.get("zones", ()):
+                if zone["id"] == zone_id:
+                    return zone
+        raise KeyError(zone_id)
+
+    def report(self, change):
+        """Have every thermostat report readings that moved by change."""
+        with self._lock:
+            for thermostat in self.thermostats:
+                updated_at = dt_util.parse_datetime(thermostat["last_updated_at"])
+                thermostat["last_updated_at"] = (
+                    updated_at + REPORT_INTERVAL
+                ).isoformat()
+                for key in ("outdoor_temperature", "indoor_humidity"):
+                    thermostat[key] = str(int(thermostat[key]) + change)
+                for zone in thermostat.get("zones", ()):
+                    zone["temperature"] += change
+
+    def send(
+        self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None
+    ):
+        """Answer a request."""
+        self.requests.append((request.method, request.url))
+        parts = urlparse(request.url).path.strip("/").split("/")
+        data = dict(parse_qsl(request.body)) if isinstance(request.body, str) else {}
+        headers = {}
+        payload = {"result": {}}
+        if parts[-2:] == ["accounts", "sign_in"]:
+            payload = {
+                "success": True,
+                "result": {"mobile_id": MOBILE_ID, "api_key": API_KEY},
+            }
+            headers["Set-Cookie"] = SESSION_COOKIE
+        elif parts[-1] == "session":
+            payload = {
+                "result": {
+                    "_links": {
+                        "child": [
+                            {
+                                "data": {
+                                    "id": HOUSE_ID,
+                                    "name": self.house["result"]["name"],
+                                }
+                            }
+                        ]
+                    }
+                }
+            }
+        elif parts[1] == "houses" and len(parts) == 3:
+            with self._lock:
+                payload = copy.deepcopy(self.house)
+        elif parts[1] == "schedules":
+            payload = {"result": {"items": [{"name": name} for name in SCHEDULE_NAMES]}}
+        elif parts[1] == "xxl_thermostats" and request.method == "POST":
+            with self._lock:
+                thermostat = self.thermostat_json(int(parts[2]))
+                _named(thermostat["settings"], "type", parts[3])[
+                    "current_value"
+                ] = data["value"]
+                payload = {"result": copy.deepcopy(thermostat)}
+        elif parts[1] == "xxl_thermostats":
+            time.sleep(self.delays.get(parts[1], 0))
+            with self._lock:
+                payload = {"result": copy.deepcopy(self.thermostat_json(int(parts[2])))}
+        elif parts[1] == "xxl_zones" and request.method == "POST":
+            time.sleep(self.delays.get(parts[3], 0))
+            with self._lock:
+                zone = self.zone_json(int(parts[2]))
+                if parts[3] not in self.ignored:
+                    apply_zone_post(zone, parts[3], data)
+                payload = {"result": copy.deepcopy(zone)}
+        return _response(request, payload, headers)
+
+    def close(self):
+        """Remember that the session was closed."""
+        self.closed = True
+
+
+def _response(request, payload, headers):
+    """Return a response carrying a json payload."""
+    response = requests.Response()
+    response.status_code = 200
+    response.reason = "OK"
+    response.headers = CaseInsensitiveDict(headers)
+    response.url = request.url
+    response.request = request
+    response.encoding = "utf-8"
+    # pylint: disable=protected-access
+    response._content = json.dumps(payload).encode("utf-8")
+    return response
+
+
+def _named(items, field, name):
+    """Return the item of a list whose field is name."""
+    for item in items:
+        if item.get(field) == name:
+            return item
+    raise KeyError(name)
+
+
+def _number(value):
+    """Return a form value as the number it encodes."""
+    number = float(value)
+    return int(number) if number.is_integer() else number
+
+
+def apply_zone_post(zone, end_point, data):
+    """Change a zone the way a post to one of its end points does."""
+    settings, features = zone["settings"], zone["features"]
+    if end_point == "zone_mode":
+        _named(settings, "type", "zone_mode")["current_value"] = data["value"]
+        _named(features, "name", "thermostat_mode")["value"] = data["value"]
+        zone["current_zone_mode"] = data["value"]
+    elif end_point == "run_mode":
+        _named(settings, "type", "run_mode")["current_value"] = data["value"]
+        _named(features, "name", "thermostat_run_mode")["value"] = data["value"]
+    elif end_point == "return_to_schedule":
+        _named(settings, "type", "run_mode")["current_value"] = "run_schedule"
+        _named(features, "name", "thermostat_run_mode")["value"] = "run_schedule"
+        _named(settings, "type", "preset_selected")["current_value"] = SCHEDULE_PRESET
+        _set_setpoints(zone, SCHEDULE_SETPOINTS["heat"], SCHEDULE_SETPOINTS["cool"])
+    elif end_point == "setpoints":
+        _set_setpoints(zone, _number(data["heat"]), _number(data["cool"]))
+    elif end_point == "preset_selected":
+        _named(settings, "type", "preset_selected")["current_value"] = int(
+            data["value"]
+        )
+
+
+def _set_setpoints(zone, heat, cool):
+    """Set both setpoints of a zone."""
+    zone["setpoints"] = {"heat": heat, "cool": cool}
+    zone["heating_setpoint"] = heat
+    zone["cooling_setpoint"] = cool
+    thermostat_feature = _named(zone["features"], "name", "thermostat")
+    thermostat_feature["setpoint_heat"] = heat
+    thermostat_feature["setpoint_cool"] = cool
@@ -0,0 +1,76 @@
+"""Fixtures for the nexia tests."""
+import asyncio
+import inspect
+import sys
+
+import pytest
+
+from homeassistant import config_entries, core
+from homeassistant.setup import async_setup_component
+from homeassistant.util.unit_system import IMPERIAL_SYSTEM
+
+from .common import FakeNexiaCloud
+
+if sys.version_info >= (3, 11):
+    # Home Assistant 0.107 hands coroutines to asyncio.wait, which
+    # newer Pythons only accept as tasks.
+    _asyncio_wait = asyncio.wait
+
+    async def _wait_for_coroutines(aws, *args, **kwargs):
+        return await _asyncio_wait(
+            [asyncio.ensure_future(aw) for aw in aws], *args, **kwargs
+        )
+
+    asyncio.wait = _wait_for_coroutines
+
+
+@pytest.hookimpl(tryfirst=True)
+def pytest_pyfunc_call(pyfuncitem):
+    """Run coroutine tests in the event loop of the loop fixture."""
+    if not inspect.iscoroutinefunction(pyfuncitem.obj):
+        return None
+    loop = pyfuncitem.funcargs["loop"]
+    kwargs = {
+        name: pyfuncitem.funcargs[name] for name in pyfuncitem._fixtureinfo.argnames
+    }
+    loop.run_until_complete(pyfuncitem.obj(**kwargs))
+    return True
+
+
+@pytest.fixture
+def loop():
+    """Return a fresh event loop."""
+    loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(loop)
+    yield loop
+    loop.close()
+    asyncio.set_event_loop(None)
+
+
+@pytest.fixture
+def hass(loop, tmp_path):
+    """Return a running Home Assistant with its config in a temp dir."""
+    hass = loop.run_until_complete(_async_create_hass(str(tmp_path)))
+    yield hass
+    loop.run_until_complete(hass.async_stop(force=True))
+
+
+@pytest.fixture
+def cloud():
+    """Return a fake mynexia.com serving the fixture house."""
+    return FakeNexiaCloud()
+
+
+async def _async_create_hass(config_dir):
+    """Create Home Assistant inside the running loop."""
+    hass = core.HomeAssistant()
+    hass.config.config_dir = config_dir
+    hass.config.skip_pip = True
+    # The fixture thermostats are in fahrenheit
+    hass.config.units = IMPERIAL_SYSTEM
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    assert await async_setup_component(hass, "homeassistant", {})
+    assert await async_setup_component(hass, "persistent_notification", {})
+    hass.state = core.CoreState.running
+    return hass
@@ -0,0 +1,30 @@
+"""Tests for the houses of a nexia account."""
+from unittest.mock import patch
+
+from nexia.home import NexiaHome
+
+from custom_components.nexia.account import NexiaAccountHome
+
+from .common import HOUSE_ID, PASSWORD, USERNAME
+
+
+def test_account_home_shares_session(cloud, tmp_path):
+    """Test another house uses the session of the logged in one."""
+    account_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(tmp_path / "nexia.conf"),
+    )
+    account_home.session = cloud.create_session()
+    account_home.login()
+
+    with patch("nexia.home.requests.session") as session:
+        house = NexiaAccountHome(account_home, HOUSE_ID)
+    session.assert_not_called()
+    house.update()
+
+    assert house.session is account_home.session
+    assert house.get_name() == account_home.get_name()
+    assert house.get_thermostat_ids()
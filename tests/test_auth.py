@@ -0,0 +1,61 @@
+"""Tests for the nexia login timing."""
+from unittest.mock import patch
+
+import pytest
+
+from custom_components.nexia.auth import MAX_SESSION_LIFETIME, NexiaAuthHome
+
+from .common import PASSWORD, USERNAME
+
+START = 1_600_000_000.0
+HOUR = 3600
+
+
+@pytest.fixture
+def nexia_home(cloud, tmp_path):
+    """Return a NexiaAuthHome served by the fake cloud."""
+    nexia_home = NexiaAuthHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(tmp_path / "nexia.conf"),
+    )
+    nexia_home.session = cloud.create_session()
+    return nexia_home
+
+
+def _login_at(nexia_home, now):
+    """Log in at a point in time."""
+    with patch("custom_components.nexia.auth.time.time", return_value=now):
+        nexia_home.login()
+
+
+def test_learns_lifetime_of_own_session(nexia_home):
+    """Test the lifetime is learned from a session this process logged in."""
+    _login_at(nexia_home, START)
+    _login_at(nexia_home, START + 5 * HOUR)
+
+    assert nexia_home.session_lifetime == 5 * HOUR
+
+
+def test_ignores_restored_session(nexia_home):
+    """Test a restored session does not teach a lifetime."""
+    nexia_home.mobile_id = 1
+    nexia_home.logged_in_at = START
+    nexia_home.login_restored = True
+    _login_at(nexia_home, START + 3 * HOUR)
+
+    assert nexia_home.session_lifetime is None
+    assert not nexia_home.login_restored
+
+    _login_at(nexia_home, START + 8 * HOUR)
+    assert nexia_home.session_lifetime == 5 * HOUR
+
+
+def test_caps_learned_lifetime(nexia_home):
+    """Test a session that lasted through a long outage is capped."""
+    _login_at(nexia_home, START)
+    _login_at(nexia_home, START + 30 * 24 * HOUR)
+
+    assert nexia_home.session_lifetime == MAX_SESSION_LIFETIME
@@ -0,0 +1,178 @@
+"""Benchmarks of the work the integration does on the event loop.
+
+The state write of one entity is timed for each thermostat variant,
+and the bytes it allocates are recorded and kept under a budget. A
+baseline is committed in .benchmarks, compare a run against it and
+fail when a benchmark got more than 25% slower:
+
+    python -m pytest tests/test_benchmarks.py --benchmark-compare=0001 \
+        --benchmark-compare-fail=mean:25%
+
+The baseline is only meaningful on the machine it was saved on. Save
+one of your own first with --benchmark-save=baseline.
+"""
+import copy
+import tracemalloc
+
+from nexia.home import NexiaHome
+import pytest
+
+from custom_components.nexia.const import DOMAIN
+from custom_components.nexia.events import NexiaTransitionEvents
+from custom_components.nexia.transport import NexiaReplay
+
+from .common import PASSWORD, USERNAME, async_setup_nexia, record_house
+
+# Thermostats in the replayed house
+REPLAY_SCALE = 50
+# The thermostat and zone the variants are applied to
+THERMOSTAT_ID = 2059661
+ZONE_ID = 83261002
+# Bytes a single state write may allocate at its peak
+MAX_WRITE_ALLOCATION = 8 * 1024
+
+
+def _nexia_entities(hass, domain):
+    """Return the nexia entities of a platform."""
+    return [
+        entity
+        for entity in hass.data[domain].entities
+        if entity.platform.platform_name == DOMAIN
+    ]
+
+
+def _plain_thermostat(thermostat_json):
+    """Strip the humidity, emergency heat and compressor features."""
+    thermostat_json.pop("indoor_humidity", None)
+    thermostat_json["settings"] = [
+        setting
+        for setting in thermostat_json["settings"]
+        if setting["type"] not in ("dehumidify", "humidify", "emergency_heat")
+    ]
+    thermostat_json["features"] = [
+        feature
+        for feature in thermostat_json["features"]
+        if feature["name"] != "thermostat_compressor_speed"
+    ]
+
+
+def _humidity(thermostat_json):
+    """Give the thermostat a humidity sensor, humidifier and dehumidifier."""
+    dehumidify = _setting(thermostat_json, "dehumidify")
+    _plain_thermostat(thermostat_json)
+    thermostat_json["indoor_humidity"] = 45
+    humidify = copy.deepcopy(dehumidify)
+    humidify.update(type="humidify", title="Humidify Set Point", current_value=0.4)
+    thermostat_json["settings"].extend([dehumidify, humidify])
+
+
+def _emergency_heat(thermostat_json):
+    """Give the thermostat emergency heat."""
+    _plain_thermostat(thermostat_json)
+    thermostat_json["settings"].append(
+        {
+            "type": "emergency_heat",
+            "title": "Emergency Heat",
+            "current_value": False,
+            "options": [
+                {"value": True, "label": "On"},
+                {"value": False, "label": "Off"},
+            ],
+        }
+    )
+
+
+def _variable_speed_compressor(thermostat_json):
+    """Give the thermostat a running variable speed compressor."""
+    _plain_thermostat(thermostat_json)
+    thermostat_json["features"].append(
+        {"name": "thermostat_compressor_speed", "compressor_speed": 0.65}
+    )
+
+
+def _setting(thermostat_json, setting_type):
+    """Return a setting of the thermostat json."""
+    for setting in thermostat_json["settings"]:
+        if setting["type"] == setting_type:
+            return setting
+    raise KeyError(setting_type)
+
+
+def _allocated(write):
+    """Return the peak bytes one call to write allocates."""
+    write()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        write()
+        return tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+
+
+@pytest.mark.parametrize(
+    "variant,domain,unique_id",
+    [
+        (_humidity, "climate", ZONE_ID),
+        (_emergency_heat, "climate", ZONE_ID),
+        (
+            _variable_speed_compressor,
+            "sensor",
+            f"{THERMOSTAT_ID}_get_current_compressor_speed",
+        ),
+    ],
+    ids=["humidity", "emergency_heat", "variable_speed_compressor"],
+)
+async def test_state_write(hass, cloud, benchmark, variant, domain, unique_id):
+    """Benchmark writing the state of one entity of a thermostat variant."""
+    variant(cloud.thermostat_json(THERMOSTAT_ID))
+    await async_setup_nexia(hass, cloud)
+    (entity,) = [
+        entity
+        for entity in _nexia_entities(hass, domain)
+        if entity.unique_id == unique_id
+    ]
+
+    allocated = _allocated(entity.async_write_ha_state)
+    benchmark.extra_info["allocated_bytes"] = allocated
+    benchmark(entity.async_write_ha_state)
+
+    assert allocated < MAX_WRITE_ALLOCATION
+
+
+async def test_transition_events_diff(hass, cloud, tmp_path, benchmark):
+    """Benchmark diffing a large replayed house for transition events."""
+    path = tmp_path / "session.jsonl.gz"
+    record_house(cloud, path)
+    nexia_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(tmp_path / "replay.conf"),
+    )
+    nexia_home.session = NexiaReplay(str(path), 0, REPLAY_SCALE).create_session()
+    nexia_home.login()
+    nexia_home.update()
+    assert len(nexia_home.thermostats) == REPLAY_SCALE * len(cloud.thermostats)
+    events = NexiaTransitionEvents(hass, nexia_home)
+
+    benchmark(events.async_update)
+
+
+async def test_scale_follows_thermostat_json(hass, cloud):
+    """Test the cached unit and limits are read again for new features."""
+    await async_setup_nexia(hass, cloud)
+    entity = _nexia_entities(hass, "climate")[0]
+    # pylint: disable=protected-access
+    thermostat = entity._thermostat
+    min_temp, max_temp = entity.min_temp, entity.max_temp
+
+    thermostat_json = copy.deepcopy(thermostat._thermostat_json)
+    for feature in thermostat_json["features"]:
+        if feature.get("name") == "thermostat":
+            feature["setpoint_heat_min"] = min_temp + 5
+            feature["setpoint_cool_max"] = max_temp - 5
+    thermostat.update_thermostat_json(thermostat_json)
+
+    assert (entity.min_temp, entity.max_temp) == (min_temp + 5, max_temp - 5)
@@ -0,0 +1,118 @@
+"""Tests for the nexia poll cadence."""
+from datetime import timedelta
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+import homeassistant.util.dt as dt_util
+
+from custom_components.nexia.cadence import (
+    MAX_LATE_POLLS,
+    NexiaCadence,
+    thermostat_fingerprint,
+)
+
+from .common import load_fixture
+
+START = dt_util.utcnow()
+# The thermostat updates 37 seconds after the first poll and then
+# every period, the integration polls every two minutes until it learns
+DEFAULT_INTERVAL = timedelta(seconds=120)
+PHASE = timedelta(seconds=37)
+
+
+def _simulate(period, polls, timestamped=False):
+    """Poll a thermostat that updates every period and return the cadence.
+
+    Also returns how long after the update each of the last ten polls
+    that found fresh data came.
+    """
+    cadence = NexiaCadence("Test", DEFAULT_INTERVAL)
+    now = START
+    lags = []
+    with patch("custom_components.nexia.cadence.dt_util.utcnow") as utcnow:
+        for _ in range(polls):
+            utcnow.return_value = now
+            updates = (now - START - PHASE) // period
+            updated_at = START + PHASE + period * updates
+            fresh_polls = cadence.fresh_polls
+            if timestamped:
+                cadence.observe(updated_at)
+            else:
+                cadence.observe(None, str(updates))
+            if cadence.fresh_polls > fresh_polls:
+                lags.append(now - updated_at)
+            now += cadence.next_poll_delay()
+    return cadence.cadence, lags[-10:]
+
+
+@pytest.mark.parametrize("timestamped", [False, True])
+@pytest.mark.parametrize("seconds", [90, 300])
+def test_cadence_locks(seconds, timestamped):
+    """Test polls lock to the cadence the thermostat updates at."""
+    period = timedelta(seconds=seconds)
+    cadence, lags = _simulate(period, 100, timestamped)
+
+    assert abs(cadence - period) <= timedelta(seconds=10)
+    assert max(lags) <= timedelta(seconds=15)
+
+
+def test_cadence_follows_change():
+    """Test a thermostat that starts updating faster is followed."""
+    cadence = NexiaCadence("Test", DEFAULT_INTERVAL)
+    now = START
+    with patch("custom_components.nexia.cadence.dt_util.utcnow") as utcnow:
+        for period in (timedelta(seconds=300), timedelta(seconds=240)):
+            begin = now
+            for _ in range(60):
+                utcnow.return_value = now
+                cadence.observe(None, f"{period}-{(now - begin) // period}")
+                now += cadence.next_poll_delay()
+
+    assert abs(cadence.cadence - timedelta(seconds=240)) <= timedelta(seconds=15)
+
+
+def test_late_update_polls_capped():
+    """Test a late update is only looked for a few times per cycle."""
+    period = timedelta(seconds=300)
+    cadence = NexiaCadence("Test", DEFAULT_INTERVAL)
+    with patch("custom_components.nexia.cadence.dt_util.utcnow") as utcnow:
+        for updates in range(10):
+            utcnow.return_value = START + period * updates
+            cadence.observe(START + period * updates)
+
+        # The thermostat stops updating for two cycles
+        last_update = utcnow.return_value
+        now = last_update + cadence.next_poll_delay()
+        polls = []
+        while now < last_update + period * 3:
+            utcnow.return_value = now
+            cadence.observe(last_update)
+            polls.append(now - last_update)
+            now += cadence.next_poll_delay()
+
+    assert cadence.cadence == period
+    seconds = [poll.total_seconds() for poll in polls]
+    # Three retries 10, 20 and 40 seconds apart, then one poll a cycle
+    assert seconds == [305, 315, 335, 375, 605]
+    assert len(polls) == MAX_LATE_POLLS + 2
+
+
+def test_fingerprint_ignores_commands():
+    """Test only readings from the thermostat change the fingerprint."""
+    house = load_fixture("mobile_houses_123456.json")
+    thermostat_json = house["result"]["_links"]["child"][0]["data"]["items"][0]
+    thermostat = SimpleNamespace(_thermostat_json=thermostat_json)
+    zone_json = thermostat_json["zones"][0]
+    fingerprint = thermostat_fingerprint(thermostat)
+
+    # A command response and compaction
+    zone_json["setpoints"] = {"heat": 60, "cool": 80}
+    zone_json["heating_setpoint"] = 60
+    del thermostat_json["icon"]
+    assert thermostat_fingerprint(thermostat) == fingerprint
+
+    # A new reading
+    zone_json["temperature"] += 1
+    assert thermostat_fingerprint(thermostat) != fingerprint
@@ -0,0 +1,185 @@
+"""Tests for the nexia climate platform."""
+import pytest
+
+from homeassistant.components.climate.const import (
+    ATTR_HVAC_MODE,
+    ATTR_TARGET_TEMP_HIGH,
+    ATTR_TARGET_TEMP_LOW,
+    DOMAIN as CLIMATE_DOMAIN,
+    HVAC_MODE_AUTO,
+    HVAC_MODE_HEAT_COOL,
+    SERVICE_SET_HVAC_MODE,
+    SERVICE_SET_TEMPERATURE,
+)
+from homeassistant.const import ATTR_ENTITY_ID
+
+from .common import (
+    SCHEDULE_PRESET,
+    SCHEDULE_SETPOINTS,
+    apply_zone_post,
+    async_setup_nexia,
+)
+
+ZONE_ID = 83261002
+
+
+async def _async_setup_held_zone(hass, cloud):
+    """Set up the integration with the zone held in heat at 65-85."""
+    zone_json = cloud.zone_json(ZONE_ID)
+    apply_zone_post(zone_json, "run_mode", {"value": "permanent_hold"})
+    apply_zone_post(zone_json, "zone_mode", {"value": "HEAT"})
+    apply_zone_post(zone_json, "setpoints", {"heat": "65", "cool": "85"})
+    apply_zone_post(zone_json, "preset_selected", {"value": "2"})
+    await async_setup_nexia(hass, cloud)
+    for entity in hass.data[CLIMATE_DOMAIN].entities:
+        # pylint: disable=protected-access
+        if entity._zone.zone_id == ZONE_ID:
+            return entity
+    raise KeyError(ZONE_ID)
+
+
+def _zone_state(zone):
+    """Return what a zone is set to."""
+    # pylint: disable=protected-access
+    return (
+        zone.get_requested_mode(),
+        zone.get_current_mode(),
+        zone.is_in_permanent_hold(),
+        zone.get_heating_setpoint(),
+        zone.get_cooling_setpoint(),
+        zone._get_zone_setting("preset_selected")["current_value"],
+    )
+
+
+@pytest.mark.parametrize("slow_post", [None, "return_to_schedule", "zone_mode"])
+async def test_fused_return_to_schedule(hass, cloud, slow_post):
+    """Test the zone ends up as the cloud has it whichever post lands last."""
+    entity = await _async_setup_held_zone(hass, cloud)
+    cloud.delays = {slow_post: 0.2}
+
+    await hass.services.async_call(
+        CLIMATE_DOMAIN,
+        SERVICE_SET_HVAC_MODE,
+        {ATTR_ENTITY_ID: entity.entity_id, ATTR_HVAC_MODE: HVAC_MODE_AUTO},
+        blocking=True,
+    )
+
+    # pylint: disable=protected-access
+    zone = entity._zone
+    assert _zone_state(zone) == (
+        "AUTO",
+        "AUTO",
+        False,
+        SCHEDULE_SETPOINTS["heat"],
+        SCHEDULE_SETPOINTS["cool"],
+        SCHEDULE_PRESET,
+    )
+
+
+@pytest.mark.parametrize("slow_post", [None, "run_mode", "zone_mode", "setpoints"])
+async def test_fused_mode_and_setpoints(hass, cloud, slow_post):
+    """Test a mode and setpoints sent together all end up on the zone."""
+    entity = await _async_setup_held_zone(hass, cloud)
+    cloud.delays = {slow_post: 0.2}
+
+    await hass.services.async_call(
+        CLIMATE_DOMAIN,
+        SERVICE_SET_TEMPERATURE,
+        {
+            ATTR_ENTITY_ID: entity.entity_id,
+            ATTR_HVAC_MODE: HVAC_MODE_HEAT_COOL,
+            ATTR_TARGET_TEMP_LOW: 68,
+            ATTR_TARGET_TEMP_HIGH: 76,
+        },
+        blocking=True,
+    )
+
+    # pylint: disable=protected-access
+    zone = entity._zone
+    assert _zone_state(zone)[:5] == ("AUTO", "AUTO", True, 68, 76)
+    requests = [
+        url.rsplit("/", 1)[-1] for method, url in cloud.requests if method == "POST"
+    ]
+    # The setpoints only go out once the mode has landed
+    assert requests[-1] == "setpoints"
+
+
+@pytest.mark.parametrize("ignored, confirmed", [(set(), 1), ({"setpoints"}, 0)])
+async def test_fused_command_confirmed(hass, cloud, ignored, confirmed):
+    """Test a mode and setpoints command is confirmed by what it asked for."""
+    entity = await _async_setup_held_zone(hass, cloud)
+    cloud.ignored = ignored
+
+    await hass.services.async_call(
+        CLIMATE_DOMAIN,
+        SERVICE_SET_TEMPERATURE,
+        {
+            ATTR_ENTITY_ID: entity.entity_id,
+            ATTR_HVAC_MODE: HVAC_MODE_HEAT_COOL,
+            ATTR_TARGET_TEMP_LOW: 68,
+            ATTR_TARGET_TEMP_HIGH: 76,
+        },
+        blocking=True,
+    )
+    # pylint: disable=protected-access
+    await entity._coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    thermostat_id = entity._thermostat.thermostat_id
+    confirmations = entity._confirmations
+    assert confirmations.stats[thermostat_id].confirmed == confirmed
+    assert confirmations.pending_count(thermostat_id) == 1 - confirmed
+
+
+async def test_repeated_setpoints_skipped(hass, cloud):
+    """Test setpoints the zone already has are counted and not sent again."""
+    entity = await _async_setup_held_zone(hass, cloud)
+    data = {
+        ATTR_ENTITY_ID: entity.entity_id,
+        ATTR_TARGET_TEMP_LOW: 68,
+        ATTR_TARGET_TEMP_HIGH: 76,
+    }
+
+    for _ in range(2):
+        await hass.services.async_call(
+            CLIMATE_DOMAIN, SERVICE_SET_TEMPERATURE, data, blocking=True
+        )
+
+    posts = [
+        url
+        for method, url in cloud.requests
+        if method == "POST" and url.endswith("/setpoints")
+    ]
+    assert len(posts) == 1
+    # pylint: disable=protected-access
+    command_stats = entity._command_stats
+    assert command_stats.executed[SERVICE_SET_TEMPERATURE] == 1
+    assert command_stats.skipped[SERVICE_SET_TEMPERATURE] == 1
+
+
+async def test_humidity_support_sensors(hass, cloud):
+    """Test humidity support is kept out of the zone states."""
+    entity = await _async_setup_held_zone(hass, cloud)
+    # pylint: disable=protected-access
+    thermostat = entity._thermostat
+
+    state = hass.states.get(entity.entity_id)
+    assert "humidify_supported" not in state.attributes
+    assert "dehumidify_supported" not in state.attributes
+    assert state.attributes["min_humidity"] == 35
+    assert state.attributes["max_humidity"] == 65
+
+    sensors = {
+        sensor._call: sensor
+        for sensor in hass.data["binary_sensor"].entities
+        if sensor.unique_id.startswith(f"{thermostat.thermostat_id}_has_")
+    }
+    assert sensors["has_humidify_support"].is_on == thermostat.has_humidify_support()
+    assert (
+        sensors["has_dehumidify_support"].is_on == thermostat.has_dehumidify_support()
+    )
+    # Written once, the sensors do not follow the refreshes
+    for sensor in sensors.values():
+        assert hass.states.get(sensor.entity_id).state in ("on", "off")
+        listener = sensor._async_handle_coordinator_update
+        assert listener not in entity._coordinator._listeners
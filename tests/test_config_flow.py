@@ -0,0 +1,25 @@
+"""Tests for the nexia config flow."""
+from homeassistant import data_entry_flow
+from homeassistant.const import CONF_PASSWORD, CONF_USERNAME
+
+from custom_components.nexia.const import DOMAIN, NEXIA_DEVICE
+from custom_components.nexia.session import async_get_session_cache
+
+from .common import PASSWORD, USERNAME, async_setup_nexia
+
+
+async def test_duplicate_keeps_session(hass, cloud):
+    """Test adding an account twice leaves the session of the entry alone."""
+    entry = await async_setup_nexia(hass, cloud)
+    nexia_home = hass.data[DOMAIN][entry.entry_id][NEXIA_DEVICE]
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN,
+        context={"source": "user"},
+        data={CONF_USERNAME: USERNAME, CONF_PASSWORD: PASSWORD},
+    )
+
+    assert result["type"] == data_entry_flow.RESULT_TYPE_ABORT
+    sessions = await async_get_session_cache(hass)
+    # pylint: disable=protected-access
+    assert sessions._sessions[USERNAME] is nexia_home
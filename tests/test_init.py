@@ -0,0 +1,129 @@
+"""Tests for setting up and unloading the nexia integration."""
+import asyncio
+from datetime import timedelta
+import threading
+
+from homeassistant.const import ATTR_NOW, EVENT_HOMEASSISTANT_STOP, EVENT_TIME_CHANGED
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+
+from custom_components.nexia.const import (
+    CONF_LOOP_CALL_THRESHOLD,
+    CONF_RETENTION,
+    COORDINATORS,
+    DOMAIN,
+    HOUSES,
+    NEXIA_DEVICE,
+    PAYLOAD_SIZE,
+    RETENTION_FULL,
+    UPDATE_COORDINATOR,
+)
+
+from custom_components.nexia.executor import async_get_executor
+
+from .common import HOUSE_ID, async_setup_nexia
+
+
+async def test_reload_reuses_houses(hass, cloud):
+    """Test a reload neither logs in nor lists the houses again."""
+    entry = await async_setup_nexia(hass, cloud)
+    cloud.requests.clear()
+
+    assert await hass.config_entries.async_reload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert list(hass.data[DOMAIN][entry.entry_id][HOUSES]) == [HOUSE_ID]
+    assert not [url for method, url in cloud.requests if method == "POST"]
+
+
+async def test_full_retention_keeps_payload(hass, cloud):
+    """Test the full retention option keeps the raw house payload."""
+    entry = await async_setup_nexia(hass, cloud)
+    house_data = hass.data[DOMAIN][entry.entry_id][HOUSES][HOUSE_ID]
+    compact_size = house_data[PAYLOAD_SIZE]
+    assert house_data[NEXIA_DEVICE].devices_json is None
+
+    hass.config_entries.async_update_entry(
+        entry, options={CONF_RETENTION: RETENTION_FULL}
+    )
+    await hass.async_block_till_done()
+
+    # The reused session keeps the house as it is until the next refresh
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    await entry_data[UPDATE_COORDINATOR].async_refresh()
+    house_data = entry_data[HOUSES][HOUSE_ID]
+    assert house_data[NEXIA_DEVICE].devices_json is not None
+    assert house_data[PAYLOAD_SIZE] > compact_size
+
+
+async def test_unload_leaves_nothing_behind(hass, cloud):
+    """Test unloading cancels refreshes and timers and closes the session."""
+    listeners = hass.bus.async_listeners()
+    entry = await async_setup_nexia(hass, cloud)
+    coordinators = hass.data[DOMAIN][entry.entry_id][COORDINATORS]
+
+    # A refresh still waiting for the cloud when the entry unloads
+    cloud.delays = {"xxl_thermostats": 0.5}
+    caller = hass.async_create_task(coordinators[-1].async_refresh())
+    await asyncio.sleep(0.05)
+    assert await hass.config_entries.async_unload(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The refresh is cancelled but whoever awaited it is not
+    assert caller.done() and not caller.cancelled()
+    assert caller.exception() is None
+    assert not [
+        task
+        for task in asyncio.all_tasks()
+        if task is not asyncio.current_task() and not task.done()
+    ]
+    for coordinator in coordinators:
+        # pylint: disable=protected-access
+        assert coordinator._refresh_task is None
+        assert coordinator._unsub_refresh is None
+        assert not coordinator._listeners
+    # Let the delayed writes of the stores run, only timers remain
+    hass.bus.async_fire(
+        EVENT_TIME_CHANGED, {ATTR_NOW: dt_util.utcnow() + timedelta(seconds=15)}
+    )
+    await hass.async_block_till_done()
+    assert hass.bus.async_listeners().get(EVENT_TIME_CHANGED) == listeners.get(
+        EVENT_TIME_CHANGED
+    )
+    assert cloud.closed
+
+
+async def test_loop_monitor_stops_with_home_assistant(hass):
+    """Test the loop call monitor stops logging summaries on stop."""
+    listeners = hass.bus.async_listeners().get(EVENT_TIME_CHANGED)
+    assert await async_setup_component(
+        hass, DOMAIN, {DOMAIN: {CONF_LOOP_CALL_THRESHOLD: 5}}
+    )
+    assert hass.bus.async_listeners().get(EVENT_TIME_CHANGED) != listeners
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await hass.async_block_till_done()
+
+    assert hass.bus.async_listeners().get(EVENT_TIME_CHANGED) == listeners
+
+
+async def test_executor_jobs_outlive_stop(hass):
+    """Test pool jobs are waited for and still run once Home Assistant stops."""
+    executor = async_get_executor(hass)
+    release = threading.Event()
+    finished = []
+
+    def _job(name):
+        release.wait(5)
+        finished.append(name)
+
+    executor.async_add_executor_job(_job, "running")
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_STOP)
+    await asyncio.sleep(0)
+    # A refresh finishing up submits another job after the stop
+    late = executor.async_add_executor_job(_job, "late")
+    release.set()
+    await hass.async_block_till_done()
+
+    assert sorted(finished) == ["late", "running"]
+    await late
@@ -0,0 +1,243 @@
+"""Load test a large replayed account over hours of simulated time.
+
+The recorded account is copied into NEXIA_REPLAY_HOUSES houses with
+NEXIA_REPLAY_SCALE copies of every thermostat and set up in Home
+Assistant. Simulated time then runs for NEXIA_LOAD_HOURS hours, every
+house is commanded, and the event loop blocking time, the CPU time of
+a refresh, the state write rate and the memory growth are reported as
+test properties and logged. Memory is traced with tracemalloc, which
+slows everything down, so the timings are upper bounds.
+
+Run it on its own for the numbers, against the bundled fixture house
+or a recording of a real one:
+
+    NEXIA_REPLAY=/config/nexia_session.jsonl.gz NEXIA_REPLAY_HOUSES=50 \
+        python -m pytest -s --log-cli-level=INFO tests/test_replay_scale.py
+"""
+import asyncio
+from datetime import timedelta
+import logging
+import os
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from homeassistant.components.climate.const import (
+    ATTR_FAN_MODE,
+    ATTR_TARGET_TEMP_HIGH,
+    ATTR_TARGET_TEMP_LOW,
+    DOMAIN as CLIMATE_DOMAIN,
+    SERVICE_SET_FAN_MODE,
+    SERVICE_SET_TEMPERATURE,
+)
+from homeassistant.const import (
+    ATTR_ENTITY_ID,
+    ATTR_NOW,
+    EVENT_STATE_CHANGED,
+    EVENT_TIME_CHANGED,
+)
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+
+from custom_components.nexia.const import (
+    CONF_LOOP_CALL_THRESHOLD,
+    COORDINATORS,
+    DATA_LOOP_MONITOR,
+    DOMAIN,
+    HOUSE_AGGREGATES,
+    HOUSES,
+    PLATFORMS,
+    SIGNAL_THERMOSTAT_UPDATE,
+    SIGNAL_ZONE_UPDATE,
+)
+from custom_components.nexia.transport import SCALE_ID_OFFSET, NexiaReplay
+
+from .common import async_setup_nexia, record_house
+
+_LOGGER = logging.getLogger(__name__)
+
+HOUSES_COUNT = int(os.environ.get("NEXIA_REPLAY_HOUSES", 2))
+SCALE = int(os.environ.get("NEXIA_REPLAY_SCALE", 1))
+HOURS = int(os.environ.get("NEXIA_LOAD_HOURS", 2))
+# Simulated seconds between ticks of the clock
+TICK = 10
+# Thermostat polls recorded with new readings each
+RECORDED_POLLS = 30
+# Library calls on the event loop slower than this are logged
+LOOP_CALL_THRESHOLD = 50
+# Event loop stalls are sampled this often
+LAG_PROBE_INTERVAL = 0.005
+# The state of the simulated hours after the first may grow this much
+MAX_HOURLY_GROWTH = 2 * 1024 * 1024
+# The zone the recorded commands were sent to
+COMMAND_ZONE_ID = 83261002
+
+
+class _LagProbe:
+    """Measure how long the event loop is kept from running a task."""
+
+    def __init__(self):
+        """Initialize the probe."""
+        self.max_lag = 0.0
+        self._task = None
+
+    def start(self):
+        """Start sampling."""
+        self._task = asyncio.ensure_future(self._probe())
+
+    async def stop(self):
+        """Stop sampling."""
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _probe(self):
+        """Sleep briefly over and over and record the oversleep."""
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(LAG_PROBE_INTERVAL)
+            lag = time.perf_counter() - start - LAG_PROBE_INTERVAL
+            self.max_lag = max(self.max_lag, lag)
+
+
+def _counter(counts, key):
+    """Return a callback counting its calls under key."""
+
+    def _count(*_args):
+        counts[key] = counts.get(key, 0) + 1
+
+    return _count
+
+
+async def test_scaled_replay(hass, cloud, tmp_path, record_property):
+    """Test a large account keeps up over hours of simulated time."""
+    path = os.environ.get("NEXIA_REPLAY")
+    if path is None:
+        path = tmp_path / "session.jsonl.gz"
+        record_house(cloud, path, RECORDED_POLLS)
+    replay = NexiaReplay(str(path), 0, SCALE, HOUSES_COUNT)
+
+    assert await async_setup_component(
+        hass, DOMAIN, {DOMAIN: {CONF_LOOP_CALL_THRESHOLD: LOOP_CALL_THRESHOLD}}
+    )
+    setup_start, setup_cpu = time.perf_counter(), time.process_time()
+    entry = await async_setup_nexia(hass, replay)
+    setup_time = time.perf_counter() - setup_start
+    setup_cpu = time.process_time() - setup_cpu
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    houses = entry_data[HOUSES]
+    coordinators = entry_data[COORDINATORS]
+
+    # Every house and thermostat copy has ids of its own
+    assert len(houses) == HOUSES_COUNT
+    thermostat_coordinators = coordinators[1:]
+    assert len(thermostat_coordinators) % (HOUSES_COUNT * SCALE) == 0
+    entities = {
+        domain: [
+            entity
+            for entity in hass.data[domain].entities
+            if entity.platform.platform_name == DOMAIN
+        ]
+        for domain in PLATFORMS
+    }
+    assert all(entities.values())
+    entity_count = sum(len(domain_entities) for domain_entities in entities.values())
+    zones = entities[CLIMATE_DOMAIN]
+    assert len({zone.unique_id for zone in zones}) == len(zones)
+
+    # Every refresh, state write and dispatcher signal is counted
+    counts = {}
+    for coordinator in coordinators:
+        coordinator.async_add_listener(_counter(counts, "refreshes"))
+    hass.bus.async_listen(EVENT_STATE_CHANGED, _counter(counts, "state_writes"))
+    # pylint: disable=protected-access
+    commanded = [
+        zone
+        for zone in zones
+        if zone._zone.zone_id % SCALE_ID_OFFSET == COMMAND_ZONE_ID
+    ]
+    assert len(commanded) == HOUSES_COUNT * SCALE
+    signals = [nexia_data[HOUSE_AGGREGATES].signal for nexia_data in houses.values()]
+    for zone in commanded:
+        signals.append(f"{SIGNAL_ZONE_UPDATE}-{zone._zone.zone_id}")
+        signals.append(f"{SIGNAL_THERMOSTAT_UPDATE}-{zone._thermostat.thermostat_id}")
+    for signal in signals:
+        async_dispatcher_connect(hass, signal, _counter(counts, signal))
+
+    now = dt_util.utcnow()
+    probe = _LagProbe()
+    hourly_memory = []
+    loop_cpu = 0.0
+    tracemalloc.start()
+    wall, cpu = time.perf_counter(), time.process_time()
+    # A plain function, a mock would keep every call
+    with patch("homeassistant.util.dt.utcnow", lambda: now), patch(
+        "homeassistant.helpers.update_coordinator.utcnow", lambda: now
+    ):
+        probe.start()
+        for tick in range(HOURS * 3600 // TICK):
+            if tick * TICK % 3600 == 0:
+                hourly_memory.append(tracemalloc.get_traced_memory()[0])
+            if tick == 1:
+                for zone in commanded:
+                    await hass.services.async_call(
+                        CLIMATE_DOMAIN,
+                        SERVICE_SET_TEMPERATURE,
+                        {
+                            ATTR_ENTITY_ID: zone.entity_id,
+                            ATTR_TARGET_TEMP_LOW: 70,
+                            ATTR_TARGET_TEMP_HIGH: 78,
+                        },
+                    )
+                    await hass.services.async_call(
+                        CLIMATE_DOMAIN,
+                        SERVICE_SET_FAN_MODE,
+                        {ATTR_ENTITY_ID: zone.entity_id, ATTR_FAN_MODE: "On"},
+                    )
+            now += timedelta(seconds=TICK)
+            tick_cpu = time.thread_time()
+            hass.bus.async_fire(EVENT_TIME_CHANGED, {ATTR_NOW: now})
+            await hass.async_block_till_done()
+            loop_cpu += time.thread_time() - tick_cpu
+        await probe.stop()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    hourly_memory.append(tracemalloc.get_traced_memory()[0])
+    tracemalloc.stop()
+
+    refreshes = counts.get("refreshes", 0)
+    growth = [after - before for before, after in zip(hourly_memory, hourly_memory[1:])]
+    metrics = {
+        "houses": HOUSES_COUNT,
+        "thermostats": len(thermostat_coordinators),
+        "zones": len(zones),
+        "entities": entity_count,
+        "simulated_hours": HOURS,
+        "setup_seconds": round(setup_time, 3),
+        "setup_cpu_seconds": round(setup_cpu, 3),
+        "refreshes": refreshes,
+        "cpu_ms_per_refresh": round(cpu / refreshes * 1000, 3),
+        "loop_cpu_ms_per_refresh": round(loop_cpu / refreshes * 1000, 3),
+        "loop_busy_percent": round(loop_cpu / wall * 100, 1),
+        "max_loop_lag_ms": round(probe.max_lag * 1000, 1),
+        "state_writes_per_simulated_hour": round(counts.get("state_writes", 0) / HOURS),
+        "state_writes_per_second": round(counts.get("state_writes", 0) / wall, 1),
+        "memory_growth_per_hour": growth,
+    }
+    slowest = hass.data[DOMAIN][DATA_LOOP_MONITOR].slowest_call_sites(1)
+    if slowest:
+        (entity_id, prop, call), site = slowest[0]
+        metrics["slowest_loop_call"] = f"{entity_id}.{prop} -> {call}: {site}"
+    for name, value in metrics.items():
+        record_property(name, value)
+    _LOGGER.info(
+        "Load test results:\n%s",
+        "\n".join(f"  {name}: {value}" for name, value in metrics.items()),
+    )
+
+    assert all(coordinator.last_update_success for coordinator in coordinators)
+    # Every thermostat is polled at least every two minutes
+    assert refreshes >= len(thermostat_coordinators) * HOURS * 30
+    assert counts.get("state_writes")
+    assert all(counts.get(signal) for signal in signals)
+    # After the first hour the retained state stops growing
+    assert max(growth[1:], default=0) < MAX_HOURLY_GROWTH
@@ -0,0 +1,43 @@
+"""Tests for the nexia schedule cache."""
+from datetime import timedelta
+import os
+
+from homeassistant.const import ATTR_NOW, EVENT_TIME_CHANGED
+import homeassistant.util.dt as dt_util
+
+from custom_components.nexia.const import ATTR_SCHEDULE_NAMES
+from custom_components.nexia.schedules import KEY_SCHEDULE, schedule_store
+
+from .common import HOUSE_ID, SCHEDULE_NAMES, async_setup_nexia
+
+
+async def test_schedule_sensor_summarizes(hass, cloud):
+    """Test the schedule sensor only carries a summary of the schedule."""
+    await async_setup_nexia(hass, cloud)
+
+    states = [
+        state
+        for state in hass.states.async_all()
+        if ATTR_SCHEDULE_NAMES in state.attributes
+    ]
+    assert states
+    for state in states:
+        assert state.attributes[ATTR_SCHEDULE_NAMES] == SCHEDULE_NAMES
+        assert KEY_SCHEDULE not in state.attributes
+
+
+async def test_remove_entry_removes_schedules(hass, cloud):
+    """Test removing the entry removes the cached schedules of its houses."""
+    entry = await async_setup_nexia(hass, cloud)
+    # Let the delayed save of the synced schedules run
+    hass.bus.async_fire(
+        EVENT_TIME_CHANGED, {ATTR_NOW: dt_util.utcnow() + timedelta(seconds=5)}
+    )
+    await hass.async_block_till_done()
+    store = schedule_store(hass, entry.entry_id, HOUSE_ID)
+    assert os.path.exists(store.path)
+
+    await hass.config_entries.async_remove(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert not os.path.exists(store.path)
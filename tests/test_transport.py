@@ -0,0 +1,117 @@
+"""Tests for the nexia record and replay transports."""
+import gzip
+
+from nexia.home import NexiaHome
+
+from custom_components.nexia.account import discover_houses
+from custom_components.nexia.transport import (
+    REPLAY_TOKENS,
+    SCALE_ID_OFFSET,
+    NexiaRecorder,
+    NexiaReplay,
+)
+
+from .common import (
+    API_KEY,
+    HOUSE_ID,
+    MOBILE_ID,
+    PASSWORD,
+    SESSION_COOKIE,
+    USERNAME,
+)
+
+
+def _record_login(cloud, path):
+    """Log in and fetch the house through a recorder and return the recorder."""
+    recorder = NexiaRecorder(path)
+    nexia_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(path) + ".conf",
+    )
+    nexia_home.session = recorder.create_session()
+    nexia_home.session.mount("https://", cloud)
+    nexia_home.login()
+    nexia_home.update()
+    return recorder
+
+
+def test_recorder_redacts_secrets(cloud, tmp_path):
+    """Test passwords, tokens and cookies never reach the log."""
+    path = tmp_path / "session.jsonl.gz"
+    _record_login(cloud, path).close()
+
+    with gzip.open(path, "rt", encoding="utf-8") as fptr:
+        log = fptr.read()
+    assert log.count("\n") == len(cloud.requests)
+    for secret in (PASSWORD, API_KEY, str(MOBILE_ID), SESSION_COOKIE):
+        assert secret not in log
+
+
+def test_recorder_writes_one_stream(cloud, tmp_path):
+    """Test the log is one gzip stream and nothing is written after close."""
+    path = tmp_path / "session.jsonl.gz"
+    recorder = _record_login(cloud, path)
+    recorder.close()
+    size = path.stat().st_size
+    session = recorder.create_session()
+    session.mount("https://", cloud)
+    session.get("https://www.mynexia.com/mobile/houses/123456")
+    assert path.stat().st_size == size
+    _record_login(cloud, path).close()
+
+    # A second recording appends a stream of its own
+    assert path.read_bytes()[:size].count(b"\x1f\x8b\x08") == 1
+    assert path.read_bytes()[size:].count(b"\x1f\x8b\x08") == 1
+
+
+def test_replay_logs_in_with_stand_ins(cloud, tmp_path):
+    """Test a replayed login gets stand ins for the redacted tokens."""
+    path = tmp_path / "session.jsonl.gz"
+    _record_login(cloud, path).close()
+
+    nexia_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(tmp_path / "replay.conf"),
+    )
+    nexia_home.session = NexiaReplay(str(path), 0).create_session()
+    nexia_home.login()
+    nexia_home.update()
+
+    assert nexia_home.api_key == REPLAY_TOKENS["api_key"]
+    assert nexia_home.mobile_id == REPLAY_TOKENS["mobile_id"]
+    assert nexia_home.get_thermostat_ids()
+
+
+def test_replay_copies_houses(cloud, tmp_path):
+    """Test every house copy of a replay has ids and thermostats of its own."""
+    path = tmp_path / "session.jsonl.gz"
+    _record_login(cloud, path).close()
+
+    nexia_home = NexiaHome(
+        username=USERNAME,
+        password=PASSWORD,
+        auto_login=False,
+        auto_update=False,
+        state_file=str(tmp_path / "replay.conf"),
+    )
+    nexia_home.session = NexiaReplay(str(path), 0, 2, 3).create_session()
+    nexia_home.login()
+    nexia_home.update()
+    houses = discover_houses(nexia_home)
+
+    house_ids = [house.house_id for house in houses]
+    assert house_ids == [HOUSE_ID + copy * SCALE_ID_OFFSET for copy in range(3)]
+    thermostat_ids = [
+        thermostat_id
+        for house in houses
+        for thermostat_id in house.get_thermostat_ids()
+    ]
+    assert len(thermostat_ids) == 3 * 2 * len(cloud.thermostats)
+    assert len(set(thermostat_ids)) == len(thermostat_ids)
+    assert houses[2].get_name() == f"{houses[0].get_name()} 2"